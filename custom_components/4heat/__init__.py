@@ -1,9 +1,10 @@
 """ Integration for 4heat"""
 import voluptuous as vol
 import logging
+import time
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.core import valid_entity_id
+from homeassistant.core import SupportsResponse
 from homeassistant.const import (
     CONF_HOST,
     CONF_NAME,
@@ -11,39 +12,84 @@ from homeassistant.const import (
 )
 import homeassistant.helpers.config_validation as cv
 
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import HomeAssistantType
 
-from .const import ATTR_MARKER, ATTR_READING_ID, ATTR_STOVE_ID, DOMAIN, DATA_COORDINATOR, CONF_MODE
+from .const import (
+    ATTR_MARKER, ATTR_READING_ID, ATTR_STOVE_ID, DOMAIN, DATA_COORDINATOR,
+    DATA_SCHEDULER, CONF_MODE, CONF_PERSISTENT, CONF_MAX_CONCURRENT,
+    DEFAULT_MAX_CONCURRENT, CONF_CATALOGUE, STORAGE_VERSION,
+    SIGNAL_OPTIONS_UPDATED
+)
 from .coordinator import FourHeatDataUpdateCoordinator
+from .protocol import build_catalogue
+from .scheduler import FourHeatPollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = ["sensor", "switch", "number", "select"]
+
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
             {
-                vol.Required(CONF_NAME): cv.string,
-                vol.Required(CONF_HOST): cv.string,
+                vol.Inclusive(CONF_NAME, "stove"): cv.string,
+                vol.Inclusive(CONF_HOST, "stove"): cv.string,
                 vol.Optional(CONF_MODE, default=False): cv.boolean,
+                vol.Optional(CONF_PERSISTENT, default=False): cv.boolean,
                 vol.Optional(CONF_MONITORED_CONDITIONS): cv.ensure_list,
+                vol.Optional(
+                    CONF_MAX_CONCURRENT, default=DEFAULT_MAX_CONCURRENT
+                ): cv.positive_int,
             }
         )
     },
     extra=vol.ALLOW_EXTRA,
 )
 
+SET_VALUE_SCHEMA = vol.Schema(
+    {
+        vol.Required('entity_id'): cv.entity_id,
+        vol.Optional('value', default=5): vol.Any(vol.Coerce(int), cv.entity_id),
+    }
+)
+
+APPLY_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required('entity_id'): cv.entity_id,
+        vol.Required('registers'): {
+            vol.All(cv.string, vol.Length(min=5, max=5)): vol.Coerce(int)
+        },
+    }
+)
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required('entity_id'): cv.entity_id,
+        vol.Optional('window'): vol.All(vol.Coerce(float), vol.Range(min=1)),
+    }
+)
+
 
 async def async_setup(hass, config):
-    """Platform setup, do nothing."""
+    """Platform setup, create the poll scheduler shared by all stoves."""
     hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][DATA_SCHEDULER] = FourHeatPollScheduler(
+        config.get(DOMAIN, {}).get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT)
+    )
 
-    if DOMAIN not in config:
+    # The YAML block may only set the connection limit for all stoves,
+    # a stove is imported when it also names a host.
+    if CONF_HOST not in config.get(DOMAIN, {}):
         return True
 
+    data = dict(config[DOMAIN])
+    data.pop(CONF_MAX_CONCURRENT, None)
     hass.async_create_task(
         hass.config_entries.flow.async_init(
-            DOMAIN, context={"source": SOURCE_IMPORT}, data=dict(config[DOMAIN])
+            DOMAIN, context={"source": SOURCE_IMPORT}, data=data
         )
     )
     return True
@@ -59,47 +105,157 @@ async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry):
         id=entry.entry_id,
     )
 
-    await coordinator.async_refresh()
+    if await coordinator.async_restore():
+        # Entities start from the saved snapshot, the first live poll runs
+        # in the background so startup does not wait for the stove.
+        hass.async_create_task(coordinator.async_refresh())
+    else:
+        await coordinator.async_refresh()
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady
 
     hass.data[DOMAIN][entry.entry_id] = {
         DATA_COORDINATOR: coordinator,
     }
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
 
+    resolved = {}
+
+    def _resolve(entity_id):
+        """Return the stove, reading and marker behind a sensor, cached."""
+        if entity_id not in resolved:
+            state = hass.states.get(entity_id)
+            if state is None or ATTR_READING_ID not in state.attributes:
+                return None
+            resolved[entity_id] = (
+                state.attributes[ATTR_STOVE_ID],
+                state.attributes[ATTR_READING_ID],
+                state.attributes[ATTR_MARKER],
+            )
+        return resolved[entity_id]
 
     async def async_handle_set_value(call):
         """Handle the service call to set a value."""
-        entity_id = call.data.get('entity_id', '')
-        value = call.data.get('value', 5)        
-        val = 1
+        entity_id = call.data['entity_id']
+        value = call.data['value']
         if isinstance(value, str):
-            if value.isnumeric():
-                val = int(value)
-            elif valid_entity_id(value):
-                val = int(float(hass.states.get(value).state))
-        else:
-            val = value
-
-        if valid_entity_id(entity_id):
-            e_id = hass.states.get(entity_id)
-            if e_id.attributes[ATTR_MARKER] == 'B':
-                c = hass.data[DOMAIN][e_id.attributes[ATTR_STOVE_ID]][DATA_COORDINATOR]
-                await c.async_set_value(e_id.attributes[ATTR_READING_ID], val)
-                await c.async_request_refresh()
-            else:
-                _LOGGER.error(f'"{entity_id}" is not valid to be set')
-        else:
-            _LOGGER.error(f'"{entity_id}" is no valid entity ID')
-
-    
-    hass.services.async_register(DOMAIN, "set_value", async_handle_set_value)
+            source = hass.states.get(value)
+            if source is None:
+                raise HomeAssistantError(f'"{value}" has no state')
+            value = int(float(source.state))
 
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setup(entry, "sensor")
+        target = _resolve(entity_id)
+        if target is None or target[0] not in hass.data[DOMAIN]:
+            resolved.pop(entity_id, None)
+            raise HomeAssistantError(f'"{entity_id}" is no valid entity ID')
+        stove_id, reading_id, marker = target
+        if marker != 'B':
+            raise HomeAssistantError(f'"{entity_id}" is not valid to be set')
+        c = hass.data[DOMAIN][stove_id][DATA_COORDINATOR]
+        await c.async_set_value(reading_id, value)
+
+    async def async_handle_refresh_catalogue(call):
+        """Handle the service call to rediscover the readings of all stoves."""
+        for config_entry in hass.config_entries.async_entries(DOMAIN):
+            if config_entry.entry_id not in hass.data[DOMAIN]:
+                continue
+            c = hass.data[DOMAIN][config_entry.entry_id][DATA_COORDINATOR]
+            records = await c.async_discover()
+            if len(records) == 0:
+                _LOGGER.error(f'"{config_entry.title}" did not answer')
+                continue
+            hass.config_entries.async_update_entry(
+                config_entry,
+                data={**config_entry.data, CONF_CATALOGUE: build_catalogue(records)},
+            )
+
+    async def async_handle_get_history(call):
+        """Handle the service call to return the recent samples of a reading."""
+        c = _stove(call.data['entity_id'])
+        reading_id = resolved[call.data['entity_id']][1]
+        window = call.data.get('window', c.history_window)
+        history = c.history.get(reading_id)
+        if history is None:
+            return {"samples": [], "summary": None}
+
+        since = time.time() - window
+        return {
+            "samples": [
+                {"time": timestamp, "value": value}
+                for timestamp, value in history.samples(since)
+            ],
+            "summary": history.summary(since),
+        }
+
+    def _stove(entity_id):
+        """Return the coordinator of the stove a sensor belongs to."""
+        target = _resolve(entity_id)
+        if target is None or target[0] not in hass.data[DOMAIN]:
+            resolved.pop(entity_id, None)
+            raise HomeAssistantError(f'"{entity_id}" is not a 4heat reading')
+        return hass.data[DOMAIN][target[0]][DATA_COORDINATOR]
+
+    async def async_handle_snapshot_registers(call):
+        """Handle the service call to read all settable registers of a stove."""
+        c = _stove(call.data['entity_id'])
+        return {"registers": await c.async_snapshot_registers()}
+
+    async def async_handle_apply_profile(call):
+        """Handle the service call to write several registers at once."""
+        c = _stove(call.data['entity_id'])
+        return {"written": await c.async_apply_profile(call.data['registers'])}
+
+    hass.services.async_register(
+        DOMAIN, "set_value", async_handle_set_value, schema=SET_VALUE_SCHEMA
     )
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setup(entry, "switch")
+    hass.services.async_register(
+        DOMAIN,
+        "snapshot_registers",
+        async_handle_snapshot_registers,
+        schema=vol.Schema({vol.Required('entity_id'): cv.entity_id}),
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "apply_profile",
+        async_handle_apply_profile,
+        schema=APPLY_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
     )
+    hass.services.async_register(
+        DOMAIN,
+        "get_history",
+        async_handle_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN, "refresh_catalogue", async_handle_refresh_catalogue
+    )
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
+
+
+async def async_unload_entry(hass: HomeAssistantType, entry: ConfigEntry):
+    """Unload the entities and close the connection to the stove."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)[DATA_COORDINATOR]
+        await coordinator.async_close()
+    return unload_ok
+
+
+async def async_update_options(hass: HomeAssistantType, entry: ConfigEntry):
+    """Apply changed options to the running coordinator and entities."""
+    coordinator = hass.data[DOMAIN][entry.entry_id][DATA_COORDINATOR]
+    await coordinator.async_apply_options(entry.data, entry.options)
+    async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id))
+    await coordinator.async_request_refresh()
+
+
+async def async_remove_entry(hass: HomeAssistantType, entry: ConfigEntry):
+    """Remove the saved snapshot of a deleted entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
@@ -0,0 +1,109 @@
+"""Command queue for the 4Heat integration."""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.typing import HomeAssistantType
+
+from .const import COMMAND_COALESCE_DELAY
+from .protocol import CommandResult, build_write_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FourHeatCommandQueue:
+    """Coalesce and batch register writes for a single stove.
+
+    Writes are collected for a short moment; repeated writes to the same
+    reading only keep the latest value and everything pending is sent as
+    one multi-item SEC frame followed by a single refresh. The transport
+    serializes this frame with polls and on/off commands.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistantType,
+        send: Callable[[bytes], Awaitable[CommandResult]],
+        refresh: Callable[[list[str]], Awaitable[None]],
+        delay: float = COMMAND_COALESCE_DELAY,
+    ):
+        """Initialize the queue."""
+        self._hass = hass
+        self._send = send
+        self._refresh = refresh
+        self._delay = delay
+        self._pending = {}
+        self._waiters = []
+        self._flush_task = None
+
+    @property
+    def pending(self) -> dict[str, int]:
+        """Return the writes waiting to be sent."""
+        return dict(self._pending)
+
+    def cancel(self) -> None:
+        """Drop the pending writes and stop a batch being sent.
+
+        Their callers get an error.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._pending = {}
+        waiters, self._waiters = self._waiters, []
+        _fail(waiters, HomeAssistantError("Stove was unloaded"))
+
+    async def async_set_value(self, reading_id: str, value: int) -> CommandResult:
+        """Queue a write and wait until the batch containing it was sent.
+
+        Raises the error of the batch if it could not be sent.
+        """
+        self._pending[reading_id] = value
+        waiter = self._hass.loop.create_future()
+        self._waiters.append(waiter)
+        if self._flush_task is None:
+            self._flush_task = self._hass.async_create_task(self._async_flush())
+        return await waiter
+
+    async def _async_flush(self) -> None:
+        """Send everything pending as one frame and refresh once.
+
+        The task stays the flush task until the frame was sent, so cancel()
+        also stops a batch that is being sent. Writes queued meanwhile go
+        into the next batch.
+        """
+        await asyncio.sleep(self._delay)
+        values, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, []
+
+        frame = build_write_frame(values)
+        _LOGGER.debug(f"Command to send: {frame}")
+        try:
+            result = await self._send(frame)
+        except asyncio.CancelledError:
+            _fail(waiters, HomeAssistantError("Stove was unloaded"))
+            raise
+        except Exception as ex:
+            _fail(waiters, ex)
+            self._next_batch()
+            return
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+        self._next_batch()
+        await self._refresh(list(values))
+
+    def _next_batch(self) -> None:
+        """Start the next batch for writes queued while one was sent."""
+        self._flush_task = None
+        if self._pending:
+            self._flush_task = self._hass.async_create_task(self._async_flush())
+
+
+def _fail(waiters: list, error: Exception) -> None:
+    """Fail the callers still waiting for a batch."""
+    for waiter in waiters:
+        if not waiter.done():
+            waiter.set_exception(error)
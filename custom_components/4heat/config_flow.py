@@ -2,8 +2,6 @@
 # import logging
 
 import voluptuous as vol
-import socket
-from requests.exceptions import HTTPError, ConnectTimeout
 
 from homeassistant import config_entries
 import homeassistant.helpers.config_validation as cv
@@ -12,6 +10,7 @@ from homeassistant.const import (
     CONF_HOST,
     CONF_NAME,
     CONF_MONITORED_CONDITIONS,
+    CONF_SCAN_INTERVAL,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.util import slugify
@@ -20,12 +19,33 @@ from .const import (
     DOMAIN,
     SENSOR_TYPES, 
     DATA_QUERY,
-    SOCKET_BUFFER, 
-    SOCKET_TIMEOUT,
-    TCP_PORT,
+    ERROR_QUERY,
+    RESULT_ERROR,
+    CONF_CATALOGUE,
     CONF_MODE,
+    CONF_PERSISTENT,
+    CONF_INSTRUMENTATION,
+    CONF_PUSH,
+    CONF_MAX_AGE,
+    DEFAULT_MAX_AGE,
+    CONF_FILTER,
+    CONF_FILTER_INTERVAL,
+    DEFAULT_FILTER_INTERVAL,
+    CONF_HISTORY_LENGTH,
+    CONF_HISTORY_WINDOW,
+    DEFAULT_HISTORY_LENGTH,
+    DEFAULT_HISTORY_WINDOW,
+    CONF_SCAN_INTERVAL_FAST,
+    CONF_SCAN_INTERVAL_IDLE,
+    CONF_SCAN_INTERVAL_MAX,
+    DEFAULT_SCAN_INTERVAL_FAST,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_IDLE,
+    DEFAULT_SCAN_INTERVAL_MAX,
     CMD_MODE_OPTIONS
-)  
+)
+from .protocol import build_catalogue, reading_ids
+from .transport import FourHeatTransport, FourHeatTransportError
 
 SUPPORTED_SENSOR_TYPES = list(SENSOR_TYPES)
 
@@ -49,12 +69,17 @@ class FourHeatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
-    conditions=[]
-
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._errors = {}
         self._info = {}
+        self.conditions = []
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return FourHeatOptionsFlow(config_entry)
 
     def _host_in_configuration_exists(self, host) -> bool:
         """Return True if site_id exists in configuration."""
@@ -62,24 +87,23 @@ class FourHeatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return True
         return False
 
-    def _check_host(self, host) -> bool:
-        """Check if we can connect to the FourHeat."""
+    async def _async_check_host(self, host) -> bool:
+        """Check if we can connect to the FourHeat and discover its readings.
+
+        A stove in an error state answers SEL with ERR, then at least its
+        state and error are read.
+        """
+        transport = FourHeatTransport(host)
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(SOCKET_TIMEOUT)
-            s.connect((host, TCP_PORT))
-            s.send(DATA_QUERY)
-            result= s.recv(SOCKET_BUFFER).decode()
-            s.close()
-            result = result.replace("]","")
-            result = result.replace('"',"")
-            self.conditions = result.split(",")
-            if len(self.conditions) > 3:
-                return True
-        except (ConnectTimeout, HTTPError):
+            self.conditions = await transport.async_request(DATA_QUERY)
+            if self.conditions[:1] == [RESULT_ERROR]:
+                self.conditions = await transport.async_request(ERROR_QUERY)
+        except FourHeatTransportError:
+            self.conditions = []
+
+        if len(build_catalogue(self.conditions)) == 0:
             self._errors[CONF_HOST] = "could_not_connect"
             return False
-
         return True
 
     async def async_step_user(self, user_input=None):
@@ -92,16 +116,17 @@ class FourHeatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 name = user_input[CONF_NAME]
                 host = user_input[CONF_HOST]
                 legacy_cmd = user_input[CONF_MODE]
-                can_connect = await self.hass.async_add_executor_job(
-                    self._check_host, host
-                )
+                persistent = user_input.get(CONF_PERSISTENT, False)
+                can_connect = await self._async_check_host(host)
                 if can_connect:
                     return self.async_create_entry(
                         title=f"{name}",
                         data={
                             CONF_HOST: host,
                             CONF_MODE: legacy_cmd,
+                            CONF_PERSISTENT: persistent,
                             CONF_MONITORED_CONDITIONS: self.conditions,
+                            CONF_CATALOGUE: build_catalogue(self.conditions),
                         },
                     )
         else:
@@ -109,6 +134,7 @@ class FourHeatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             user_input[CONF_NAME] = "Stove"
             user_input[CONF_HOST] = "192.168.0.0"
             user_input[CONF_MODE] = False
+            user_input[CONF_PERSISTENT] = False
 
         default_monitored_conditions = (
             self.conditions if len(self.conditions) == 0 else DEFAULT_MONITORED_CONDITIONS
@@ -122,6 +148,9 @@ class FourHeatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_MODE, default=user_input[CONF_MODE],
                     description='mode'
                 ): bool,
+                vol.Optional(
+                    CONF_PERSISTENT, default=user_input.get(CONF_PERSISTENT, False)
+                ): bool,
                 vol.Optional(
                     CONF_MONITORED_CONDITIONS, default=default_monitored_conditions
                 ): cv.multi_select(self.conditions),
@@ -136,4 +165,101 @@ class FourHeatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Import a config entry."""
         if self._host_in_configuration_exists(user_input[CONF_HOST]):
             return self.async_abort(reason="host_exists")
-        return await self.async_step_user(user_input)
\ No newline at end of file
+        return await self.async_step_user(user_input)
+
+
+class FourHeatOptionsFlow(config_entries.OptionsFlow):
+    """4Heat options flow, changes are applied without a reload."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        data = self.config_entry.data
+        options = self.config_entry.options
+        monitored = reading_ids(
+            options.get(
+                CONF_MONITORED_CONDITIONS, data.get(CONF_MONITORED_CONDITIONS, [])
+            )
+        )
+        available = {
+            reading_id: (
+                SENSOR_TYPES[reading_id].name
+                if reading_id in SENSOR_TYPES
+                else f"UN {reading_id}"
+            )
+            + f" ({reading_id})"
+            for reading_id in [*data.get(CONF_CATALOGUE, {}), *monitored]
+        }
+        interval = vol.All(vol.Coerce(int), vol.Range(min=5))
+
+        options_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_MONITORED_CONDITIONS, default=monitored
+                ): cv.multi_select(available),
+                vol.Optional(
+                    CONF_SCAN_INTERVAL_FAST,
+                    default=options.get(
+                        CONF_SCAN_INTERVAL_FAST, DEFAULT_SCAN_INTERVAL_FAST
+                    ),
+                ): interval,
+                vol.Optional(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                ): interval,
+                vol.Optional(
+                    CONF_SCAN_INTERVAL_IDLE,
+                    default=options.get(
+                        CONF_SCAN_INTERVAL_IDLE, DEFAULT_SCAN_INTERVAL_IDLE
+                    ),
+                ): interval,
+                vol.Optional(
+                    CONF_SCAN_INTERVAL_MAX,
+                    default=options.get(
+                        CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX
+                    ),
+                ): interval,
+                vol.Optional(
+                    CONF_MAX_AGE,
+                    default=options.get(CONF_MAX_AGE, DEFAULT_MAX_AGE),
+                ): interval,
+                vol.Optional(
+                    CONF_FILTER,
+                    default=options.get(CONF_FILTER, True),
+                ): bool,
+                vol.Optional(
+                    CONF_FILTER_INTERVAL,
+                    default=options.get(CONF_FILTER_INTERVAL, DEFAULT_FILTER_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_PERSISTENT,
+                    default=options.get(
+                        CONF_PERSISTENT, data.get(CONF_PERSISTENT, False)
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_INSTRUMENTATION,
+                    default=options.get(CONF_INSTRUMENTATION, False),
+                ): bool,
+                vol.Optional(
+                    CONF_PUSH,
+                    default=options.get(CONF_PUSH, False),
+                ): bool,
+                vol.Optional(
+                    CONF_HISTORY_LENGTH,
+                    default=options.get(CONF_HISTORY_LENGTH, DEFAULT_HISTORY_LENGTH),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2000)),
+                vol.Optional(
+                    CONF_HISTORY_WINDOW,
+                    default=options.get(CONF_HISTORY_WINDOW, DEFAULT_HISTORY_WINDOW),
+                ): interval,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=options_schema)
@@ -1,7 +1,13 @@
 """Constants for the 4Heat integration."""
-from datetime import timedelta
+from dataclasses import dataclass
 
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.const import (
+    REVOLUTIONS_PER_MINUTE,
     UnitOfTemperature,
     UnitOfPressure,
     UnitOfVolumeFlowRate,
@@ -13,6 +19,10 @@ ATTR_STOVE_ID = "stove_id"
 ATTR_READING_ID = "reading_id"
 ATTR_MARKER = "marker"
 ATTR_NUM_VAL = "num_val"
+ATTR_STALE = "stale"
+ATTR_MIN = "min"
+ATTR_MAX = "max"
+ATTR_RATE = "rate_per_minute"
 
 DATA_QUERY = b'["SEL","0"]'
 ERROR_QUERY = b'["SEC","3","I30001000000000000","I30002000000000000","I30017000000000000"]'
@@ -25,71 +35,299 @@ ON_CMD_OLD = b'["SEC","1","0"]' # ON
 
 MODES = [[ON_CMD, OFF_CMD, UNBLOCK_CMD], [ON_CMD_OLD, OFF_CMD_OLD, None]]
 CONF_MODE = 'mode'
+CONF_PERSISTENT = 'persistent'
+CONF_INSTRUMENTATION = 'instrumentation'
+CONF_CATALOGUE = 'catalogue'
+CONF_HISTORY_LENGTH = 'history_length'
+CONF_HISTORY_WINDOW = 'history_window'
+CONF_PUSH = 'push'
+CONF_MAX_AGE = 'max_age'
+CONF_FILTER = 'filter'
+CONF_FILTER_INTERVAL = 'filter_interval'
+
+DEFAULT_HISTORY_LENGTH = 120
+DEFAULT_HISTORY_WINDOW = 600
+DEFAULT_MAX_AGE = 1800
+DEFAULT_FILTER_INTERVAL = 0
 CMD_MODE_OPTIONS = ['Full set (default)', 'Limited set']
 
 RESULT_VALS = 'SEC'
+RESULT_DUMP = 'SEL'
 RESULT_ERROR = 'ERR'
 
 TCP_PORT = 80
 
 SOCKET_BUFFER = 1024
+MAX_FRAME_SIZE = 16384
+MAX_QUERY_ITEMS = 20
+# Targeted queries refused this often in a row switch a stove to SEL,
+# which is probed again after TARGETED_RETRY_INTERVAL seconds
+TARGETED_MAX_REFUSALS = 3
+TARGETED_RETRY_INTERVAL = 3600
 SOCKET_TIMEOUT = 10
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 5
+RECONNECT_MAX_DELAY = 30
+COMMAND_COALESCE_DELAY = 0.5
+COMMAND_RETRIES = 3
+COMMAND_RETRY_DELAY = 1.0
+OPTIMISTIC_TIMEOUT = 60
+VERIFY_DELAY = 5
+PERSISTENT_MAX_DROPS = 3
+# Health of the connection to a stove, it is offline after this many
+# failed polls in a row and only then are all entities unavailable
+HEALTH_HEALTHY = "healthy"
+HEALTH_DEGRADED = "degraded"
+HEALTH_OFFLINE = "offline"
+# Consistency poll interval while unsolicited frames arrive over push
+PUSH_CONSISTENCY_INTERVAL = 600
+# Back to normal polling when no frame was pushed for this long
+PUSH_TIMEOUT = 300
 
 DATA_COORDINATOR = "corrdinator"
+DATA_SCHEDULER = "scheduler"
+
+SIGNAL_OPTIONS_UPDATED = "4heat_options_updated_{}"
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 300
+
+CONF_MAX_CONCURRENT = "max_concurrent"
+DEFAULT_MAX_CONCURRENT = 2
+POLL_SPACING = 1.0
+
+CONF_SCAN_INTERVAL_FAST = "scan_interval_fast"
+CONF_SCAN_INTERVAL_IDLE = "scan_interval_idle"
+CONF_SCAN_INTERVAL_MAX = "scan_interval_max"
 
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=20)
+DEFAULT_SCAN_INTERVAL_FAST = 10
+DEFAULT_SCAN_INTERVAL = 60
+DEFAULT_SCAN_INTERVAL_IDLE = 300
+DEFAULT_SCAN_INTERVAL_MAX = 900
 
 MODE_TYPE = "30001"
 ERROR_TYPE = "30002"
 POWER_TYPE = "20364"
 
+# Polling tiers, readings of a tier are fetched when older than its age
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_SLOW = "slow"
+TIER_STATIC = "static"
+
+TIER_AGES = {
+    TIER_FAST: 0,
+    TIER_NORMAL: 60,
+    TIER_SLOW: 600,
+    TIER_STATIC: None,
+}
+
+
+@dataclass
+class FourHeatSensorEntityDescription(SensorEntityDescription):
+    """Description of a stove reading.
+
+    ``scale`` converts the raw integer to the native unit, ``tier`` is the
+    polling tier. Changes smaller than ``deadband`` and changes sooner than
+    ``min_interval`` seconds after the last written state are not written.
+    """
+
+    scale: float = 1
+    tier: str = TIER_NORMAL
+    deadband: float | None = None
+    min_interval: float = 0
+
+
 SENSOR_TYPES = {
-    "30001": ["State", None, ""],
-    "30002": ["Error", None, ""],
-    "30003": ["Timer", None, ""],
-    "30004": ["Ignition", None, ""],
-    "30005": ["Exhaust temperature", UnitOfTemperature.CELSIUS, ""],
-    "30006": ["Room temperature", UnitOfTemperature.CELSIUS, ""],
-    "30007": ["Inputs", None, ""],
-    "30008": ["Combustion fan", None, ""], #RPM
-    "30009": ["Heating fan", None, ""],
-    "30011": ["Combustion power", None, ""],
-    "30012": ["Puffer temperature", UnitOfTemperature.CELSIUS, ""],
-    "30015": ["UN 30015", None, ""],
-    "30017": ["Boiler water", UnitOfTemperature.CELSIUS, ""],
-    "30020": ["Water pressure", UnitOfPressure.MBAR, ""],
-    "30025": ["Comb.FanRealSpeed", None, ""],
-    "30026": ["Airstream", UnitOfVolumeFlowRate.CUBIC_METERS_PER_HOUR, ""],
-    "30033": ["Exhaust depression", UnitOfPressure.PA, ""],
-    "30040": ["UN 30040", None, ""],
-    "30044": ["UN 30044", None, ""],
-    "30084": ["Water pump", None, ""],
-    "40007": ["UN 40007", None, ""],
-    "20005": ["Min Range of Boiler Thermostat", None, ""],
-    "20006": ["Max Range of Boiler Thermostat", None, ""],
-    "20180": ["Boiler target", UnitOfTemperature.CELSIUS, ""],
-    "20199": ["Boiler target", UnitOfTemperature.CELSIUS, ""],
-    "20205": ["Minimum Range of Boiler", UnitOfTemperature.CELSIUS, ""],
-    "20206": ["Maximum Range of Boiler", UnitOfTemperature.CELSIUS, ""],
-    "20211": ["UN 20211", None, ""],
-    "20225": ["UN 20225", None, ""],
-    "20364": ["Power Setting", None, ""],
-    "20381": ["UN 20381", None, ""],
-    "20365": ["UN 20365", None, ""],
-    "20366": ["UN 20366", None, ""],
-    "20369": ["UN 20369", None, ""],
-    "20374": ["UN 20374", None, ""],
-    "20385": ["UN 20385", None, ""],
-    "20375": ["UN 20375", None, ""],
-    "20575": ["UN 20575", None, ""],
-    "20493": ["Room temperature set point", UnitOfTemperature.CELSIUS, ""],
-    "20570": ["UN 20570", None, ""],
-    "20801": ["Heating power", None, ""],
-    "20803": ["UN 20803", None, ""],
-    "20813": ["UN 20813", None, ""],
-    "21700": ["Room termostat", UnitOfTemperature.CELSIUS, ""],
-    "40016": ["Outputs", None, ""],
-    "50001": ["Auger on", None, ""],
+    "30001": FourHeatSensorEntityDescription(key="30001", name="State", tier=TIER_FAST),
+    "30002": FourHeatSensorEntityDescription(key="30002", name="Error", tier=TIER_FAST),
+    "30003": FourHeatSensorEntityDescription(key="30003", name="Timer", tier=TIER_FAST),
+    "30004": FourHeatSensorEntityDescription(key="30004", name="Ignition", tier=TIER_FAST),
+    "30005": FourHeatSensorEntityDescription(
+        key="30005",
+        name="Exhaust temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        tier=TIER_FAST,
+    ),
+    "30006": FourHeatSensorEntityDescription(
+        key="30006",
+        name="Room temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    "30007": FourHeatSensorEntityDescription(key="30007", name="Inputs"),
+    "30008": FourHeatSensorEntityDescription(
+        key="30008",
+        name="Combustion fan",
+        native_unit_of_measurement=REVOLUTIONS_PER_MINUTE,
+        state_class=SensorStateClass.MEASUREMENT,
+        tier=TIER_FAST,
+        deadband=30,
+        min_interval=30,
+    ),
+    "30009": FourHeatSensorEntityDescription(
+        key="30009",
+        name="Heating fan",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    "30011": FourHeatSensorEntityDescription(
+        key="30011",
+        name="Combustion power",
+        state_class=SensorStateClass.MEASUREMENT,
+        tier=TIER_FAST,
+    ),
+    "30012": FourHeatSensorEntityDescription(
+        key="30012",
+        name="Puffer temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    "30015": FourHeatSensorEntityDescription(key="30015", name="UN 30015"),
+    "30017": FourHeatSensorEntityDescription(
+        key="30017",
+        name="Boiler water",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    "30020": FourHeatSensorEntityDescription(
+        key="30020",
+        name="Water pressure",
+        native_unit_of_measurement=UnitOfPressure.MBAR,
+        device_class=SensorDeviceClass.PRESSURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_unit_of_measurement=UnitOfPressure.BAR,
+        suggested_display_precision=2,
+    ),
+    "30025": FourHeatSensorEntityDescription(
+        key="30025",
+        name="Comb.FanRealSpeed",
+        native_unit_of_measurement=REVOLUTIONS_PER_MINUTE,
+        state_class=SensorStateClass.MEASUREMENT,
+        tier=TIER_FAST,
+        deadband=30,
+        min_interval=30,
+    ),
+    "30026": FourHeatSensorEntityDescription(
+        key="30026",
+        name="Airstream",
+        native_unit_of_measurement=UnitOfVolumeFlowRate.CUBIC_METERS_PER_HOUR,
+        state_class=SensorStateClass.MEASUREMENT,
+        tier=TIER_FAST,
+        deadband=2,
+        min_interval=30,
+    ),
+    "30033": FourHeatSensorEntityDescription(
+        key="30033",
+        name="Exhaust depression",
+        native_unit_of_measurement=UnitOfPressure.PA,
+        device_class=SensorDeviceClass.PRESSURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        tier=TIER_FAST,
+        deadband=2,
+        min_interval=30,
+    ),
+    "30040": FourHeatSensorEntityDescription(key="30040", name="UN 30040"),
+    "30044": FourHeatSensorEntityDescription(key="30044", name="UN 30044"),
+    "30084": FourHeatSensorEntityDescription(key="30084", name="Water pump"),
+    "40007": FourHeatSensorEntityDescription(key="40007", name="UN 40007"),
+    "20005": FourHeatSensorEntityDescription(
+        key="20005",
+        name="Min Range of Boiler Thermostat",
+        tier=TIER_SLOW,
+    ),
+    "20006": FourHeatSensorEntityDescription(
+        key="20006",
+        name="Max Range of Boiler Thermostat",
+        tier=TIER_SLOW,
+    ),
+    "20180": FourHeatSensorEntityDescription(
+        key="20180",
+        name="Boiler target",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    "20199": FourHeatSensorEntityDescription(
+        key="20199",
+        name="Boiler target",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    "20205": FourHeatSensorEntityDescription(
+        key="20205",
+        name="Minimum Range of Boiler",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        tier=TIER_SLOW,
+    ),
+    "20206": FourHeatSensorEntityDescription(
+        key="20206",
+        name="Maximum Range of Boiler",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        tier=TIER_SLOW,
+    ),
+    "20211": FourHeatSensorEntityDescription(key="20211", name="UN 20211", tier=TIER_STATIC),
+    "20225": FourHeatSensorEntityDescription(key="20225", name="UN 20225", tier=TIER_STATIC),
+    "20364": FourHeatSensorEntityDescription(key="20364", name="Power Setting"),
+    "20381": FourHeatSensorEntityDescription(key="20381", name="UN 20381", tier=TIER_STATIC),
+    "20365": FourHeatSensorEntityDescription(key="20365", name="UN 20365", tier=TIER_STATIC),
+    "20366": FourHeatSensorEntityDescription(key="20366", name="UN 20366", tier=TIER_STATIC),
+    "20369": FourHeatSensorEntityDescription(key="20369", name="UN 20369", tier=TIER_STATIC),
+    "20374": FourHeatSensorEntityDescription(key="20374", name="UN 20374", tier=TIER_STATIC),
+    "20385": FourHeatSensorEntityDescription(key="20385", name="UN 20385", tier=TIER_STATIC),
+    "20375": FourHeatSensorEntityDescription(key="20375", name="UN 20375", tier=TIER_STATIC),
+    "20575": FourHeatSensorEntityDescription(key="20575", name="UN 20575", tier=TIER_STATIC),
+    "20493": FourHeatSensorEntityDescription(
+        key="20493",
+        name="Room temperature set point",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+    ),
+    "20570": FourHeatSensorEntityDescription(key="20570", name="UN 20570", tier=TIER_STATIC),
+    "20801": FourHeatSensorEntityDescription(
+        key="20801",
+        name="Heating power",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    "20803": FourHeatSensorEntityDescription(key="20803", name="UN 20803", tier=TIER_STATIC),
+    "20813": FourHeatSensorEntityDescription(key="20813", name="UN 20813", tier=TIER_STATIC),
+    "21700": FourHeatSensorEntityDescription(
+        key="21700",
+        name="Room termostat",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    "40016": FourHeatSensorEntityDescription(key="40016", name="Outputs"),
+    "50001": FourHeatSensorEntityDescription(key="50001", name="Auger on", tier=TIER_FAST),
+}
+
+# Diagnostic sensors backed by FourHeatStats attributes
+STATS_SENSOR_TYPES = {
+    "last_poll": [
+        "Poll duration", "ms", "mdi:timer-outline", SensorStateClass.MEASUREMENT
+    ],
+    "bytes_received": [
+        "Bytes received", "B", "mdi:download-network",
+        SensorStateClass.TOTAL_INCREASING,
+    ],
+    "retries": [
+        "Retries", None, "mdi:restart", SensorStateClass.TOTAL_INCREASING
+    ],
+    "err_fallback_rate": [
+        "Error fallback rate", None, "mdi:alert-circle-outline",
+        SensorStateClass.MEASUREMENT,
+    ],
 }
 
 MODE_NAMES = {
@@ -134,6 +372,29 @@ ERROR_NAMES = {
     18: "Lack of Voltage Supply",
 }
 
+# Modes polled with the fast interval (Ignition, Stabilization, Extinguishing)
+TRANSITION_MODES = [2, 3, 4, 7, 30, 31, 32, 33, 34]
+# Modes polled with the idle interval (OFF, Standby)
+IDLE_MODES = [0, 11]
+# Modes shown as off by the state switch
+SWITCH_OFF_MODES = [0, 7, 8, 9]
+
+# Write limits of the settable registers, a bound is either a fixed value or
+# the ID of the reading holding it
+REGISTER_LIMITS = {
+    "20180": ("20205", "20206"),
+    "20199": ("20005", "20006"),
+    "20364": (1, 7),
+    "20493": (5, 35),
+}
+
+# Settable registers exposed as number entities: step and icon
+NUMBER_TYPES = {
+    "20180": [1, "mdi:water-boiler"],
+    "20199": [1, "mdi:water-boiler"],
+    "20493": [1, "mdi:home-thermometer"],
+}
+
 POWER_NAMES = {
     1: "P1",
     2: "P2",
@@ -143,3 +404,8 @@ POWER_NAMES = {
     6: "P6",
     7: "Auto",
 }
+
+# Settable registers exposed as select entities: option names by value
+SELECT_TYPES = {
+    POWER_TYPE: POWER_NAMES,
+}
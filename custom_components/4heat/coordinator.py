@@ -1,22 +1,73 @@
 """Provides the MYPV DataUpdateCoordinator."""
 from datetime import timedelta
+import asyncio
 import logging
-import socket
+import random
+import time
 
-from async_timeout import timeout
-from homeassistant.util.dt import utcnow
-from homeassistant.const import CONF_HOST
+from homeassistant.const import (
+    CONF_HOST, CONF_PORT, CONF_MONITORED_CONDITIONS, CONF_SCAN_INTERVAL
+)
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import HomeAssistantType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
-    DOMAIN, SOCKET_BUFFER, SOCKET_TIMEOUT, TCP_PORT, DATA_QUERY, ERROR_QUERY,
-    RESULT_ERROR, CONF_MODE, MODES, MODE_TYPE, ERROR_TYPE
+    DOMAIN, TCP_PORT, DATA_QUERY, ERROR_QUERY, DATA_SCHEDULER,
+    STORAGE_VERSION, STORAGE_SAVE_DELAY,
+    RESULT_ERROR, RESULT_VALS, RESULT_DUMP, CONF_MODE, CONF_PERSISTENT,
+    CONF_INSTRUMENTATION,
+    CONF_PUSH,
+    MODES, MODE_TYPE, ERROR_TYPE,
+    CONF_SCAN_INTERVAL_FAST, CONF_SCAN_INTERVAL_IDLE, CONF_SCAN_INTERVAL_MAX,
+    DEFAULT_SCAN_INTERVAL_FAST, DEFAULT_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_IDLE,
+    DEFAULT_SCAN_INTERVAL_MAX, TRANSITION_MODES, IDLE_MODES,
+    SENSOR_TYPES, TIER_FAST, TIER_NORMAL, TIER_AGES,
+    OPTIMISTIC_TIMEOUT, VERIFY_DELAY,
+    COMMAND_RETRIES, COMMAND_RETRY_DELAY,
+    CONF_HISTORY_LENGTH, CONF_HISTORY_WINDOW, DEFAULT_HISTORY_LENGTH,
+    DEFAULT_HISTORY_WINDOW, REGISTER_LIMITS, PUSH_CONSISTENCY_INTERVAL, PUSH_TIMEOUT,
+    CONF_MAX_AGE, DEFAULT_MAX_AGE, CONF_FILTER, CONF_FILTER_INTERVAL,
+    DEFAULT_FILTER_INTERVAL, TIER_STATIC, HEALTH_HEALTHY, HEALTH_DEGRADED,
+    HEALTH_OFFLINE, NUMBER_TYPES, SELECT_TYPES, TARGETED_MAX_REFUSALS,
+    TARGETED_RETRY_INTERVAL
+)
+from .commands import FourHeatCommandQueue
+from .history import ReadingHistory
+from .protocol import (
+    DECODED_NAMES, CommandResult, Reading, ReadingIndex, build_read_frames,
+    check_ack, reading_ids
 )
+from .stats import FourHeatStats, PHASE_MERGE, PHASE_DISPATCH, PHASE_POLL
+from .transport import FourHeatTransport, FourHeatTransportError, FrameParser
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _slot_reading(snapshot: list | None, slot: int) -> Reading | None:
+    """Return the reading of a slot in a snapshot."""
+    if snapshot is None or slot is None or slot >= len(snapshot):
+        return None
+    return snapshot[slot]
+
+
+def _tier(reading_id: str) -> str:
+    """Return the polling tier of a reading."""
+    if reading_id in SENSOR_TYPES:
+        return SENSOR_TYPES[reading_id].tier
+    return TIER_NORMAL
+
+
+def _persistent(config: dict, options: dict) -> bool:
+    """Return whether the connection is kept open, push needs it to be."""
+    return options.get(CONF_PUSH, False) or options.get(
+        CONF_PERSISTENT, config.get(CONF_PERSISTENT, False)
+    )
+
+
 class FourHeatDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching 4heat data."""
 
@@ -40,109 +91,823 @@ class FourHeatDataUpdateCoordinator(DataUpdateCoordinator):
             self._off_cmd = MODES[1][1]
             self._unblock_cmd = MODES[1][2]
 
-        self._next_update = 0
+        self.stats = None
+        if options.get(CONF_INSTRUMENTATION, False):
+            self.stats = FourHeatStats()
+            self.stats.start_loop_probe(hass.loop)
+        self._scheduler = hass.data[DOMAIN][DATA_SCHEDULER]
+        self._scheduler.register(id)
+        self._transport = FourHeatTransport(
+            self._host,
+            config.get(CONF_PORT, TCP_PORT),
+            persistent=_persistent(config, options),
+            stats=self.stats,
+            on_unsolicited=self._async_unsolicited,
+        )
+        self._push = options.get(CONF_PUSH, False)
+        self._push_active = False
+        self._push_frames = 0
+        self._push_unsub = None
+        self.index = ReadingIndex()
+        self._mode_slot = self.index.slot(MODE_TYPE)
+        self._last_snapshot = None
+        self._last_success = None
+        self._failures = 0
+        # Until the first poll the stove is given max_age from startup
+        self._last_poll_ok = time.time()
+        self.health = HEALTH_HEALTHY
+        self._seen = []
+        self._unavailable = set()
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{id}")
+        self._save_pending = False
+        self.stale = False
+        self._fetched = {}
+        self._optimistic = {}
+        self._verify_ids = set()
+        self._verify_unsub = None
+        self._expire_unsub = None
+        self._targeted = True
+        self._refusals = 0
+        self._targeted_retry = None
+        self.register_limits = {}
+        self._limit_slots = [
+            self.index.slot(bound)
+            for bounds in REGISTER_LIMITS.values()
+            for bound in bounds
+            if isinstance(bound, str)
+        ]
+        self._apply_monitored(config, options)
+        self._apply_intervals(options)
+        self._max_age = options.get(CONF_MAX_AGE, DEFAULT_MAX_AGE)
+        self._apply_filters(options)
+        self.history = {}
+        self._history_length = None
+        self._apply_history(options)
         self.model = "Basic"
         self.serial_number = "1"
-        update_interval = timedelta(seconds=60)
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=update_interval,
+            update_interval=timedelta(seconds=self._interval),
         )
 
-    async def _async_update_data(self) -> dict:
-        """Fetch data from 4heat."""
-        def _query_stove(query) -> list[str]:
-            try:
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(SOCKET_TIMEOUT)
-                s.connect((self._host, TCP_PORT))
-                s.send(query)
-                result = s.recv(SOCKET_BUFFER).decode()
-                s.close()
-                result = result.replace("[","")
-                result = result.replace("]","")
-                result = result.replace('"',"")
-                d = result.split(",")
-            except Exception as error:
-                _LOGGER.error(f"Update error: {error}")
-                self._next_update = 5
-                d = []
-            return d
-
-        def _update_data() -> dict:
-            """Fetch data from 4heat via sync functions."""
-            list = _query_stove(DATA_QUERY)
-            dict = self.data
-            if dict == None:
-                dict = {}
-            if len(list) > 0:
-                if list[0] == RESULT_ERROR:
-                    list = _query_stove(ERROR_QUERY)
-                    
-                for data in list:
-                    if len(data) > 3:
-                        dict[data[1:6]] = [int(data[7:]), data[0]]
-            return dict
+        self._commands = FourHeatCommandQueue(
+            hass, self._async_send_command, self._async_verify_written
+        )
 
-        try:
-            async with timeout(10):
-                d = await self.hass.async_add_executor_job(_update_data)
-                return d
-        except Exception as error:
-            raise UpdateFailed(f"Invalid response from API: {error}") from error
+    def _apply_monitored(self, config: dict, options: dict) -> None:
+        """Read the monitored readings and plan the queries for them."""
+        self.monitored_ids = reading_ids(
+            options.get(
+                CONF_MONITORED_CONDITIONS, config.get(CONF_MONITORED_CONDITIONS, [])
+            )
+        )
+        # Settable registers are always read, the stove decides which of
+        # them become number and select entities
+        wanted = [*self.monitored_ids, *NUMBER_TYPES, *SELECT_TYPES]
+        bounds = [
+            bound
+            for reading_id in wanted
+            for bound in REGISTER_LIMITS.get(reading_id, ())
+            if isinstance(bound, str)
+        ]
+        self._query_ids = list(dict.fromkeys(
+            [MODE_TYPE, *self.swiches, *wanted, *bounds]
+        ))
+        always = {MODE_TYPE, *self.swiches}
+        self._query_ages = [
+            (reading_id, TIER_AGES[TIER_FAST if reading_id in always else _tier(reading_id)])
+            for reading_id in self._query_ids
+        ]
+
+    def _due_ids(self, now: float) -> list[str]:
+        """Return the readings whose polling tier is due."""
+        fetched = self._fetched
+        due = []
+        for reading_id, age in self._query_ages:
+            last = fetched.get(reading_id)
+            # Allow for some scheduling jitter against the poll interval
+            if last is None or (age is not None and now - last >= age * 0.9):
+                due.append(reading_id)
+        return due
+
+    async def async_apply_options(self, config: dict, options: dict) -> None:
+        """Apply changed options without reloading the entry."""
+        self._apply_monitored(config, options)
+        self._apply_intervals(options)
+        self._apply_history(options)
+        self._max_age = options.get(CONF_MAX_AGE, DEFAULT_MAX_AGE)
+        self._apply_filters(options)
+        self.update_interval = self._next_interval(self.data)
+
+        persistent = _persistent(config, options)
+        if persistent != self._transport.persistent:
+            await self._transport.async_set_persistent(persistent)
+        self.async_set_push(options.get(CONF_PUSH, False))
+
+        if options.get(CONF_INSTRUMENTATION, False) != (self.stats is not None):
+            if self.stats is None:
+                self.stats = FourHeatStats()
+                self.stats.start_loop_probe(self.hass.loop)
+            else:
+                self.stats.stop_loop_probe()
+                self.stats = None
+            self._transport.stats = self.stats
+
+    @callback
+    def async_set_push(self, enabled: bool) -> None:
+        """Use or ignore the frames the stove sends by itself.
+
+        Pushed frames arrive on the kept-open connection of the transport,
+        the stove module only serves one connection at a time.
+        """
+        self._push = enabled
+        if not enabled:
+            self._async_push_stopped()
+
+    @callback
+    def _async_unsolicited(self, items: list[str]) -> None:
+        """Merge a pushed frame and notify the entities of its readings.
+
+        Push only counts as working once the stove actually sent a frame,
+        polling slows down until frames stop for PUSH_TIMEOUT.
+        """
+        if not self._push or items[:1] != [RESULT_VALS] or len(items) <= 2:
+            return
+        self._push_frames += 1
+        if self._push_unsub is not None:
+            self._push_unsub()
+        self._push_unsub = async_call_later(
+            self.hass, PUSH_TIMEOUT, self._async_push_timeout
+        )
+        if not self._push_active:
+            _LOGGER.debug(f"{self._host} pushes changes, polling less often")
+            self._push_active = True
+            self.update_interval = self._next_interval(self.data)
+
+        self.stale = False
+        self._async_merge_partial(reading_ids(items[2:]), items)
+
+    @callback
+    def _async_merge_partial(self, ids: list[str], records: list[str]) -> None:
+        """Merge records received between two polls.
+
+        The poll timer keeps running. async_set_updated_data would restart
+        it, and frequent partial updates would then keep the full poll from
+        ever running.
+        """
+        now = time.monotonic()
+        for reading_id in ids:
+            self._fetched[reading_id] = now
+        data = self.index.merge(self.data, records)
+        self._merged(self.data, data)
+        self.data = data
+        self.async_update_listeners()
+
+    @callback
+    def _async_push_timeout(self, _now) -> None:
+        """Poll normally again after the stove stopped pushing."""
+        self._push_unsub = None
+        self._async_push_stopped()
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_push_stopped(self) -> None:
+        if self._push_unsub is not None:
+            self._push_unsub()
+            self._push_unsub = None
+        if self._push_active:
+            _LOGGER.debug(f"No frames pushed by {self._host}, polling normally")
+            self._push_active = False
+            self.update_interval = self._next_interval(self.data)
+
+    def _apply_filters(self, options: dict) -> None:
+        """Read the significance filter settings used by the sensors."""
+        self.filters = options.get(CONF_FILTER, True)
+        self.filter_interval = options.get(CONF_FILTER_INTERVAL, DEFAULT_FILTER_INTERVAL)
+
+    def _apply_history(self, options: dict) -> None:
+        """Keep a history buffer for every monitored numeric reading."""
+        length = options.get(CONF_HISTORY_LENGTH, DEFAULT_HISTORY_LENGTH)
+        self.history_window = options.get(CONF_HISTORY_WINDOW, DEFAULT_HISTORY_WINDOW)
+        if length != self._history_length:
+            self.history = {}
+            self._history_length = length
+
+        wanted = [
+            reading_id
+            for reading_id in self.monitored_ids
+            if reading_id not in DECODED_NAMES
+        ] if length > 0 else []
+        self.history = {
+            reading_id: self.history.get(reading_id) or ReadingHistory(length)
+            for reading_id in wanted
+        }
+        self._history_slots = [
+            (self.index.slot(reading_id), history)
+            for reading_id, history in self.history.items()
+        ]
+
+    def _merged(self, previous: list | None, data: list) -> None:
+        """Book-keeping for a snapshot that was merged with new records."""
+        now = time.time()
+        seen = self._seen
+        if len(seen) < len(data):
+            seen.extend([None] * (len(data) - len(seen)))
+        for slot, reading in enumerate(data):
+            if reading is not None and reading is not _slot_reading(previous, slot):
+                seen[slot] = now
+        self._record_history(previous, data)
+        self._update_limits(previous, data)
+
+    def _check_freshness(self) -> set[int]:
+        """Mark readings not seen for too long, return the slots that flipped.
+
+        Static readings are only read once and never age.
+        """
+        oldest = time.time() - self._max_age
+        ids = self.index.ids
+        unavailable = {
+            slot
+            for slot, seen in enumerate(self._seen)
+            if seen is not None and seen < oldest and _tier(ids[slot]) != TIER_STATIC
+        }
+        flipped = unavailable ^ self._unavailable
+        self._unavailable = unavailable
+        return flipped
+
+    def is_available(self, slot: int) -> bool:
+        """Return whether the reading of a slot is recent enough to be shown."""
+        return self.last_update_success and slot not in self._unavailable
+
+    def last_seen(self, slot: int) -> float | None:
+        """Return when a reading was last received from the stove."""
+        if slot is None or slot >= len(self._seen):
+            return None
+        return self._seen[slot]
+
+    def _set_health(self, health: str) -> None:
+        if health != self.health:
+            _LOGGER.info(f"{self._host} is {health}")
+            self.health = health
+
+    def _record_history(self, previous: list | None, data: list) -> None:
+        """Add the freshly fetched readings to their history buffers."""
+        now = time.time()
+        for slot, history in self._history_slots:
+            reading = _slot_reading(data, slot)
+            if reading is not None and reading is not _slot_reading(previous, slot):
+                history.add(now, reading.value)
+
+    def _update_limits(self, previous: list | None, data: list) -> None:
+        """Rebuild the write limits when a reading holding a bound was fetched."""
+        if previous is not None and all(
+            _slot_reading(data, slot) is _slot_reading(previous, slot)
+            for slot in self._limit_slots
+        ):
+            return
+
+        limits = {}
+        for reading_id, bounds in REGISTER_LIMITS.items():
+            values = []
+            for bound in bounds:
+                if isinstance(bound, str):
+                    reading = _slot_reading(data, self.index.get(bound))
+                    bound = None if reading is None else reading.value
+                values.append(bound)
+            limits[reading_id] = tuple(values)
+        self.register_limits = limits
+
+    def is_writable(self, reading_id: str) -> bool:
+        """Return whether the stove reports a reading as a settable register."""
+        reading = _slot_reading(self.data, self.index.get(reading_id))
+        return reading is not None and reading.marker == "B"
+
+    def _validate_write(self, reading_id: str, value: int) -> int:
+        """Check a write against the register, clamp it into its limits.
+
+        Only registers the stove reported as settable can be written.
+        """
+        current = _slot_reading(self.data, self.index.get(reading_id))
+        if current is None:
+            raise HomeAssistantError(f"{self._host} did not report register {reading_id}")
+        if current.marker != "B":
+            raise HomeAssistantError(f"Reading {reading_id} can not be set")
+
+        low, high = self.register_limits.get(reading_id, (None, None))
+        if low is not None and high is not None and low > high:
+            low, high = high, low
+        if low is not None and value < low:
+            _LOGGER.warning(f"{value} is below the minimum of {reading_id}, using {low}")
+            value = low
+        elif high is not None and value > high:
+            _LOGGER.warning(f"{value} is above the maximum of {reading_id}, using {high}")
+            value = high
+        return value
+
+    def _is_current(self, reading_id: str, value: int) -> bool:
+        """Return whether the stove confirmed a register has a value."""
+        slot = self.index.get(reading_id)
+        current = _slot_reading(self.data, slot)
+        return (
+            current is not None
+            and current.value == value
+            and not self.stale
+            and slot not in self._optimistic
+        )
+
+    def history_summary(self, reading_id: str, window: float = None) -> dict | None:
+        """Return min, max and rate of change of a reading over a window."""
+        history = self.history.get(reading_id)
+        if history is None:
+            return None
+        if window is None:
+            window = self.history_window
+        return history.summary(time.time() - window)
+
+    def _apply_intervals(self, options: dict) -> None:
+        """Read the polling interval bounds from the options."""
+        self._interval_fast = options.get(
+            CONF_SCAN_INTERVAL_FAST, DEFAULT_SCAN_INTERVAL_FAST
+        )
+        self._interval = options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        self._interval_idle = options.get(
+            CONF_SCAN_INTERVAL_IDLE, DEFAULT_SCAN_INTERVAL_IDLE
+        )
+        self._interval_max = options.get(
+            CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX
+        )
+
+    def _next_interval(self, data: list | None) -> timedelta:
+        """Return the poll interval for the current stove state.
+
+        Transitions like ignition or extinguishing are polled fast, an idle
+        stove slowly. A degraded stove keeps its interval and an offline one
+        backs off exponentially.
+        """
+        if self.health == HEALTH_OFFLINE:
+            seconds = min(
+                self._interval_fast * 2 ** self._failures, self._interval_max
+            )
+        else:
+            mode = _slot_reading(data, self._mode_slot)
+            if mode is None:
+                seconds = self._interval
+            elif mode.value in TRANSITION_MODES:
+                seconds = self._interval_fast
+            elif mode.value in IDLE_MODES:
+                seconds = self._interval_idle
+            else:
+                seconds = self._interval
+            if self._push_active:
+                seconds = max(seconds, PUSH_CONSISTENCY_INTERVAL)
+        return timedelta(seconds=self._scheduler.next_delay(self.stove_id, seconds))
 
-    async def async_turn_on(self) -> bool:
+    async def _query_stove(self, query: bytes, poll: bool = True) -> list[str]:
+        """Send a query to the stove and return the records of the reply."""
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(SOCKET_TIMEOUT)
-            s.connect((self._host, TCP_PORT))
-            s.send(self._on_cmd)
-            s.recv(SOCKET_BUFFER).decode()
-            s.close()
-            _LOGGER.debug("Toggle ON")
-        except Exception as ex:
-            _LOGGER.error(ex)
-
-    async def async_turn_off(self) -> bool:
+            async with self._scheduler.async_slot(poll):
+                d = await self._transport.async_request(query)
+        except FourHeatTransportError as error:
+            _LOGGER.error(f"Update error: {error}")
+            d = []
+        return d
+
+    async def _async_query_readings(self, ids: list[str]) -> list[str] | None:
+        """Query only the given readings, return None if the stove refused."""
+        records = []
+        for number, frame in enumerate(build_read_frames(ids)):
+            reply = await self._query_stove(frame, poll=number == 0)
+            if len(reply) == 0:
+                return []
+            if reply[0] != RESULT_VALS:
+                return None
+            records.extend(reply)
+        return records
+
+    def _targeted_refused(self) -> None:
+        """Switch to SEL after repeated refusals of targeted queries."""
+        self._refusals += 1
+        if self._refusals < TARGETED_MAX_REFUSALS:
+            return
+        _LOGGER.info(f"{self._host} does not answer targeted queries, using SEL")
+        self._targeted = False
+        self._targeted_retry = time.monotonic() + TARGETED_RETRY_INTERVAL
+
+    async def _async_query_all(self) -> list[str]:
+        """Query the full SEL dump of the stove."""
+        records = await self._query_stove(DATA_QUERY)
+        if len(records) > 0 and records[0] == RESULT_ERROR:
+            if self.stats is not None:
+                self.stats.err_fallbacks += 1
+            records = await self._query_stove(ERROR_QUERY, poll=False)
+        return records
+
+    async def async_discover(self) -> list[str]:
+        """Query all readings the stove offers."""
+        return await self._async_query_all()
+
+    async def async_snapshot_registers(self) -> dict[str, int]:
+        """Read all settable registers at once, return {id: value}."""
+        records = await self._async_query_all()
+        if len(records) == 0 or records[0] == RESULT_ERROR:
+            raise HomeAssistantError(f"{self._host} did not answer")
+
+        data = self.index.merge(self.data, records)
+        self._merged(self.data, data)
+        self.async_set_updated_data(data)
+        return {
+            reading.id: reading.value
+            for reading in data
+            if reading is not None and reading.marker == "B"
+        }
+
+    async def async_apply_profile(self, values: dict[str, int]) -> dict[str, int]:
+        """Write several registers as one batch followed by one verification.
+
+        Returns the values that were sent after clamping; registers already
+        at their value are left out.
+        """
+        writes = {
+            reading_id: self._validate_write(reading_id, value)
+            for reading_id, value in values.items()
+        }
+        writes = {
+            reading_id: value
+            for reading_id, value in writes.items()
+            if not self._is_current(reading_id, value)
+        }
+        if len(writes) == 0:
+            return writes
+
+        await asyncio.gather(*(
+            self.async_set_value(reading_id, value)
+            for reading_id, value in writes.items()
+        ))
+        return writes
+
+    async def _async_update_data(self) -> list:
+        """Fetch data from 4heat."""
+        if self.stats is None:
+            return await self._async_fetch()
+
+        start = time.perf_counter()
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(SOCKET_TIMEOUT)
-            s.connect((self._host, TCP_PORT))
-            s.send(self._off_cmd)
-            s.recv(SOCKET_BUFFER).decode()
-            s.close()
-            _LOGGER.debug("Toggle OFF")
-        except Exception as ex:
-            _LOGGER.error(ex)
-
-    async def async_unblock(self) -> bool:
+            return await self._async_fetch()
+        finally:
+            self.stats.polls += 1
+            self.stats.add(PHASE_POLL, time.perf_counter() - start)
+
+    async def _async_fetch(self) -> list:
+        """Poll the stove and merge the reply into a new snapshot."""
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(SOCKET_TIMEOUT)
-            s.connect((self._host, TCP_PORT))
-            s.send(self._unblock_cmd)
-            s.recv(SOCKET_BUFFER).decode()
-            s.close()
-            _LOGGER.debug("Toggle Unblock")
-        except Exception as ex:
-            _LOGGER.error(ex)
-
-
-    async def async_set_value(self, id, value) -> bool:
-        val = str(value).zfill(12)
-        set_val = f'["SEC","1","B{id}{val}"]'.encode()
-        _LOGGER.debug(f"Command to send: {set_val}")
+            records = None
+            now = time.monotonic()
+            if not self._targeted and now >= self._targeted_retry:
+                # Probe again, a single refusal goes back to SEL
+                self._targeted = True
+                self._refusals = TARGETED_MAX_REFUSALS - 1
+            if self._targeted:
+                due = self._due_ids(now)
+                records = await self._async_query_readings(due)
+                if records:
+                    self._refusals = 0
+                    for reading_id in due:
+                        self._fetched[reading_id] = now
+            if records is None:
+                records = await self._async_query_all()
+                # A stove in an error state answers ERR to everything, only
+                # a SEL dump right after shows targeted queries are refused
+                if self._targeted and records[:1] == [RESULT_DUMP]:
+                    self._targeted_refused()
+            if self.stats is None:
+                data = self.index.merge(self.data, records)
+            else:
+                start = time.perf_counter()
+                data = self.index.merge(self.data, records)
+                self.stats.add(PHASE_MERGE, time.perf_counter() - start)
+        except Exception as error:
+            return self._poll_failed(f"Invalid response from API: {error}")
+
+        if len(records) == 0:
+            return self._poll_failed("No answer")
+
+        self._merged(self.data, data)
+        self._failures = 0
+        self._last_poll_ok = time.time()
+        self._set_health(HEALTH_HEALTHY)
+        self.stale = False
+        if not self._save_pending:
+            # Every call would push the save back, only the first one schedules it
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+        self.update_interval = self._next_interval(data)
+        return data
+
+    def _poll_failed(self, error: str) -> list:
+        """Keep the last snapshot after a failed poll until the stove is offline.
+
+        Failed polls only degrade the stove, entities stay available until
+        their own readings are too old. The stove is offline once the last
+        successful poll is as old as the maximum reading age.
+        """
+        self._failures += 1
+        if self.data is None or time.time() - self._last_poll_ok >= self._max_age:
+            self._set_health(HEALTH_OFFLINE)
+        else:
+            self._set_health(HEALTH_DEGRADED)
+        self.update_interval = self._next_interval(self.data)
+        if self.health == HEALTH_OFFLINE:
+            raise UpdateFailed(f"{self._host}: {error}")
+        _LOGGER.debug(f"{self._host}: {error}, keeping the last readings")
+        return self.data
+
+    async def async_restore(self) -> bool:
+        """Restore the last saved snapshot, marked as stale."""
+        stored = await self._store.async_load()
+        if not stored or not stored.get("readings"):
+            return False
+        self.data = self.index.restore(stored["readings"])
+        # Restored readings keep the time they were last received, readings
+        # saved without one are never marked unavailable for their age
+        seen = stored.get("seen", {})
+        self._seen = [
+            None if reading is None else seen.get(reading.id)
+            for reading in self.data
+        ]
+        self._update_limits(None, self.data)
+        received = [seen for seen in self._seen if seen is not None]
+        if received:
+            self._last_poll_ok = max(received)
+        self.stale = True
+        _LOGGER.debug(f"Restored {len(stored['readings'])} readings of {self._host}")
+        return True
+
+    @callback
+    def _snapshot_to_store(self) -> dict:
+        """Return the current snapshot for saving."""
+        return {
+            "readings": {
+                reading.id: [reading.marker, reading.value]
+                for reading in (self.data or [])
+                if reading is not None
+            },
+            "seen": {
+                reading.id: seen
+                for reading, seen in zip(self.data or [], self._seen)
+                if reading is not None and seen is not None
+            },
+        }
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the snapshot for a delayed save and allow the next one."""
+        self._save_pending = False
+        return self._snapshot_to_store()
+
+    def reading(self, slot: int) -> Reading | None:
+        """Return the current reading of a slot, optimistic values first."""
+        if self._optimistic:
+            optimistic = self._optimistic.get(slot)
+            if optimistic is not None:
+                return optimistic[0]
+        return _slot_reading(self.data, slot)
+
+    @callback
+    def async_set_optimistic(self, reading_id: str, value: int, confirm=None) -> None:
+        """Show a commanded value until the stove confirms it or it times out.
+
+        ``confirm`` tells whether a reported value confirms the command, by
+        default the value has to match exactly.
+        """
+        slot = self.index.slot(reading_id)
+        current = _slot_reading(self.data, slot)
+        marker = "B" if current is None else current.marker
+        if confirm is None:
+            confirm = lambda reported: reported == value
+        self._optimistic[slot] = (
+            Reading(marker, reading_id, value),
+            confirm,
+            time.monotonic() + OPTIMISTIC_TIMEOUT,
+        )
+        self._async_schedule_expiry()
+        self._async_notify_slots({slot})
+
+    @callback
+    def async_drop_optimistic(self, reading_id: str) -> None:
+        """Forget the optimistic value of a reading."""
+        slot = self.index.get(reading_id)
+        if self._optimistic.pop(slot, None) is not None:
+            self._async_notify_slots({slot})
+
+    def _settle_optimistic(self, data: list | None) -> set[int]:
+        """Drop optimistic values that were confirmed or timed out."""
+        now = time.monotonic()
+        settled = set()
+        for slot, (_, confirm, deadline) in list(self._optimistic.items()):
+            reported = _slot_reading(data, slot)
+            if (reported is not None and confirm(reported.value)) or now >= deadline:
+                del self._optimistic[slot]
+                settled.add(slot)
+        return settled
+
+    @callback
+    def _async_schedule_expiry(self) -> None:
+        """Wake up when the oldest optimistic value times out."""
+        if self._expire_unsub is not None or not self._optimistic:
+            return
+        deadline = min(deadline for _, _, deadline in self._optimistic.values())
+        self._expire_unsub = async_call_later(
+            self.hass, max(deadline - time.monotonic(), 0), self._async_expire_optimistic
+        )
+
+    @callback
+    def _async_expire_optimistic(self, _now) -> None:
+        """Drop optimistic values the stove never confirmed."""
+        self._expire_unsub = None
+        self._async_notify_slots(self._settle_optimistic(self.data))
+        self._async_schedule_expiry()
+
+    @callback
+    def _async_notify_slots(self, slots: set[int]) -> None:
+        """Update the listeners of the given slots."""
+        if not slots:
+            return
+        for update_callback, slot in list(self._listeners.values()):
+            if slot in slots:
+                update_callback()
+
+    @callback
+    def _async_schedule_verify(self, ids: list[str]) -> None:
+        """Schedule a short targeted poll of just the commanded readings."""
+        self._verify_ids.update(ids)
+        if self._verify_unsub is None:
+            self._verify_unsub = async_call_later(
+                self.hass, VERIFY_DELAY, self._async_verify
+            )
+
+    async def _async_verify_written(self, ids: list[str]) -> None:
+        """Verify the readings of a sent write batch."""
+        self._async_schedule_verify(ids)
+
+    async def _async_verify(self, _now) -> None:
+        """Poll the commanded readings instead of a full refresh."""
+        self._verify_unsub = None
+        ids, self._verify_ids = list(self._verify_ids), set()
+        if not self._targeted:
+            await self.async_request_refresh()
+            return
+
+        records = await self._async_query_readings(ids)
+        if records is None:
+            await self.async_request_refresh()
+            return
+        if len(records) == 0:
+            return
+        self._async_merge_partial(ids, records)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update only the listeners whose reading changed.
+
+        Entities register with their reading slot as listener context, the
+        new snapshot is compared against the previous one and unchanged
+        entities are not written again. A change of the update result
+        refreshes everyone so availability is kept in sync, readings that
+        became too old or were seen again refresh their own entities.
+        """
+        start = time.perf_counter() if self.stats is not None else None
+        data = self.data
+        previous = self._last_snapshot
+        force = previous is None or self._last_success != self.last_update_success
+        self._last_snapshot = data
+        self._last_success = self.last_update_success
+        settled = self._settle_optimistic(data) if self._optimistic else ()
+        flipped = self._check_freshness()
+
+        for update_callback, slot in list(self._listeners.values()):
+            if (
+                force
+                or slot is None
+                or slot in settled
+                or slot in flipped
+                or _slot_reading(data, slot) != _slot_reading(previous, slot)
+            ):
+                update_callback()
+
+        if start is not None:
+            self.stats.add(PHASE_DISPATCH, time.perf_counter() - start)
+
+    async def _async_send_command(self, cmd: bytes) -> CommandResult:
+        """Send a command and check the acknowledgement of the stove.
+
+        All commands set an absolute state (on, off, unblock or a register
+        value), so sending one twice is harmless and failed attempts are
+        retried with jittered backoff. Raises HomeAssistantError if the
+        command was not acknowledged.
+        """
+        parser = FrameParser()
+        parser.feed(cmd)
+        attempts = COMMAND_RETRIES
+        error = None
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self._scheduler.async_slot(poll=False):
+                    reply = await self._transport.async_request(cmd)
+            except FourHeatTransportError as ex:
+                error = str(ex)
+            else:
+                error = check_ack(parser.items, reply)
+                if error is None:
+                    return CommandResult(True, attempt, reply)
+
+            _LOGGER.warning(f"Command {cmd} attempt {attempt} failed: {error}")
+            if attempt < attempts:
+                if self.stats is not None:
+                    self.stats.retries += 1
+                await asyncio.sleep(
+                    COMMAND_RETRY_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                )
+
+        raise HomeAssistantError(
+            f"Command to {self._host} failed after {attempts} attempts: {error}"
+        )
+
+    async def async_turn_on(self) -> CommandResult:
+        result = await self._async_send_command(self._on_cmd)
+        _LOGGER.debug("Toggle ON")
+        self._async_schedule_verify([MODE_TYPE])
+        return result
+
+    async def async_turn_off(self) -> CommandResult:
+        result = await self._async_send_command(self._off_cmd)
+        _LOGGER.debug("Toggle OFF")
+        self._async_schedule_verify([MODE_TYPE])
+        return result
+
+    async def async_unblock(self) -> CommandResult:
+        result = await self._async_send_command(self._unblock_cmd)
+        _LOGGER.debug("Toggle Unblock")
+        self.async_set_optimistic(ERROR_TYPE, 0)
+        self._async_schedule_verify([ERROR_TYPE, MODE_TYPE])
+        return result
+
+    async def async_set_value(self, id, value) -> CommandResult:
+        """Queue a register write, concurrent writes are sent as one batch.
+
+        The value is clamped into the limits of the register; a write of the
+        value the stove already reports is skipped.
+        """
+        value = self._validate_write(id, value)
+        if self._is_current(id, value):
+            _LOGGER.debug(f"{id} already is {value}, not sending")
+            return CommandResult(True, 0, [])
+
+        self.async_set_optimistic(id, value)
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(SOCKET_TIMEOUT)
-            s.connect((self._host, TCP_PORT))
-            s.send(set_val)
-            s.recv(SOCKET_BUFFER).decode()
-            s.close()
-            _LOGGER.debug("Set value")
-        except Exception as ex:
-            _LOGGER.error(ex)
+            result = await self._commands.async_set_value(id, value)
+        except HomeAssistantError:
+            self.async_drop_optimistic(id)
+            raise
+        _LOGGER.debug("Set value")
+        return result
+
+    async def async_close(self) -> None:
+        """Stop polling and all timers, save the snapshot and disconnect."""
+        await self.async_shutdown()
+        self._scheduler.unregister(self.stove_id)
+        for unsub in (self._verify_unsub, self._expire_unsub):
+            if unsub is not None:
+                unsub()
+        self._verify_unsub = None
+        self._expire_unsub = None
+        self._optimistic.clear()
+        self._commands.cancel()
+        self.async_set_push(False)
+        if self.stats is not None:
+            self.stats.stop_loop_probe()
+        await self._transport.async_close()
+        if self.data is not None:
+            await self._store.async_save(self._snapshot_to_store())
 
+    def as_diagnostics(self) -> dict:
+        """Return the state of the coordinator for a diagnostics download."""
+        return {
+            "last_update_success": self.last_update_success,
+            "update_interval": self.update_interval.total_seconds(),
+            "failures": self._failures,
+            "health": self.health,
+            "unavailable": [self.index.ids[slot] for slot in sorted(self._unavailable)],
+            "targeted_queries": self._targeted,
+            "persistent": self._transport.persistent,
+            "push": None if not self._push else {
+                "active": self._push_active,
+                "frames": self._push_frames,
+            },
+            "query_ids": self._query_ids,
+            "stale": self.stale,
+            "readings": self._snapshot_to_store()["readings"],
+            "stats": None if self.stats is None else self.stats.as_dict(),
+        }
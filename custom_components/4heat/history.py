@@ -0,0 +1,60 @@
+"""Short term reading history for the 4Heat integration."""
+from array import array
+
+
+class ReadingHistory:
+    """Fixed size ring buffer of timestamped samples of one reading.
+
+    Samples are kept in two preallocated arrays of doubles, so the memory
+    of a buffer does not grow with the number of polls.
+    """
+
+    __slots__ = ("_times", "_values", "_size", "_next", "_count")
+
+    def __init__(self, size: int):
+        """Initialize the buffer."""
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Store a sample, overwriting the oldest one when full."""
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+    def samples(self, since: float = None) -> list[tuple[float, float]]:
+        """Return the samples oldest first, optionally only the recent ones."""
+        start = (self._next - self._count) % self._size
+        result = []
+        for offset in range(self._count):
+            pos = (start + offset) % self._size
+            if since is None or self._times[pos] >= since:
+                result.append((self._times[pos], self._values[pos]))
+        return result
+
+    def summary(self, since: float) -> dict | None:
+        """Return min, max and rate of change per minute since a timestamp."""
+        samples = self.samples(since)
+        if len(samples) == 0:
+            return None
+        values = [value for _, value in samples]
+        rate = None
+        (first_time, first_value), (last_time, last_value) = samples[0], samples[-1]
+        if last_time > first_time:
+            rate = round(
+                (last_value - first_value) / (last_time - first_time) * 60, 3
+            )
+        return {
+            "min": min(values),
+            "max": max(values),
+            "rate": rate,
+            "count": len(samples),
+        }
@@ -0,0 +1,116 @@
+"""The 4Heat integration."""
+
+import logging
+from homeassistant.components.number import NumberEntity, NumberMode
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    SENSOR_TYPES, NUMBER_TYPES, DOMAIN, DATA_COORDINATOR, SIGNAL_OPTIONS_UPDATED
+)
+from .coordinator import FourHeatDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MIN = 0
+DEFAULT_MAX = 100
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Add an FourHeat entry."""
+    coordinator: FourHeatDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        DATA_COORDINATOR
+    ]
+    entities = {}
+
+    @callback
+    def async_update_entities():
+        """Add the registers the stove reports as settable."""
+        new_entities = []
+        for sensorId in NUMBER_TYPES:
+            if sensorId in entities or not coordinator.is_writable(sensorId):
+                continue
+            entities[sensorId] = FourHeatNumber(coordinator, sensorId, entry.title)
+            new_entities.append(entities[sensorId])
+        if new_entities:
+            async_add_entities(new_entities)
+
+    async_update_entities()
+    entry.async_on_unload(coordinator.async_add_listener(async_update_entities))
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id), async_update_entities
+        )
+    )
+
+
+class FourHeatNumber(CoordinatorEntity, NumberEntity):
+    """Settable register of a 4Heat device."""
+
+    _attr_mode = NumberMode.SLIDER
+
+    def __init__(self, coordinator, sensor_type, name):
+        """Initialize the number."""
+        super().__init__(coordinator, context=coordinator.index.slot(sensor_type))
+        self._sensor = SENSOR_TYPES[sensor_type].name
+        self._name = name
+        self.type = sensor_type
+        self.coordinator = coordinator
+        self._slot = self.coordinator_context
+        self.serial_number = coordinator.serial_number
+        self.model = coordinator.model
+        self._attr_native_unit_of_measurement = (
+            SENSOR_TYPES[sensor_type].native_unit_of_measurement
+        )
+        self._attr_native_step = NUMBER_TYPES[sensor_type][0]
+        self._attr_icon = NUMBER_TYPES[sensor_type][1]
+
+    @property
+    def name(self):
+        """Return the name of the number."""
+        return f"{self._name} {self._sensor}"
+
+    @property
+    def available(self):
+        """Return True while the reading is recent enough."""
+        return self.coordinator.is_available(self._slot)
+
+    @property
+    def native_value(self):
+        """Return the value of the register."""
+        reading = self.coordinator.reading(self._slot)
+        if reading is None:
+            return None
+        return reading.value
+
+    @property
+    def native_min_value(self):
+        """Return the lower limit of the register."""
+        low = self.coordinator.register_limits.get(self.type, (None, None))[0]
+        return DEFAULT_MIN if low is None else low
+
+    @property
+    def native_max_value(self):
+        """Return the upper limit of the register."""
+        high = self.coordinator.register_limits.get(self.type, (None, None))[1]
+        return DEFAULT_MAX if high is None else high
+
+    async def async_set_native_value(self, value: float) -> None:
+        """Write the register."""
+        await self.coordinator.async_set_value(self.type, int(value))
+
+    @property
+    def unique_id(self):
+        """Return unique id based on device serial and variable."""
+        return f"{self._name}_{self.type}"
+
+    @property
+    def device_info(self):
+        """Return information about the device."""
+        return {
+            "identifiers": {(DOMAIN, self.serial_number)},
+            "name": self._name,
+            "manufacturer": "4Heat",
+            "model": self.model,
+        }
@@ -0,0 +1,226 @@
+"""Record parsing for the 4Heat stove protocol."""
+from .const import (
+    MODE_NAMES, ERROR_NAMES, POWER_NAMES,
+    MODE_TYPE, ERROR_TYPE, POWER_TYPE,
+    MAX_QUERY_ITEMS, RESULT_VALS, RESULT_ERROR,
+)
+
+DECODED_NAMES = {
+    MODE_TYPE: MODE_NAMES,
+    ERROR_TYPE: ERROR_NAMES,
+    POWER_TYPE: POWER_NAMES,
+}
+
+
+class Reading:
+    """A single reading reported by the stove.
+
+    Records look like ``J30001000000000005``: a one letter marker, the five
+    digit reading ID and the value. The decoded text of enum readings is
+    resolved once when the record is parsed.
+    """
+
+    __slots__ = ("marker", "id", "value", "text")
+
+    def __init__(self, marker: str, id: str, value: int):
+        """Initialize the reading."""
+        self.marker = marker
+        self.id = id
+        self.value = value
+        names = DECODED_NAMES.get(id)
+        self.text = value if names is None else names.get(value, value)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Reading):
+            return NotImplemented
+        return (
+            self.value == other.value
+            and self.id == other.id
+            and self.marker == other.marker
+        )
+
+    def __repr__(self) -> str:
+        return f"Reading({self.marker!r}, {self.id!r}, {self.value!r})"
+
+
+def parse_record(record: str) -> Reading | None:
+    """Parse a single record, return None for headers and garbage."""
+    if len(record) < 8:
+        return None
+    try:
+        return Reading(record[0], record[1:6], int(record[7:]))
+    except ValueError:
+        return None
+
+
+def reading_ids(conditions: list[str]) -> list[str]:
+    """Return the reading IDs of monitored conditions.
+
+    Conditions are either full records as discovered by the config flow or
+    bare reading IDs as stored by the options flow.
+    """
+    return [
+        condition if len(condition) == 5 else condition[1:6]
+        for condition in conditions
+        if len(condition) >= 5
+    ]
+
+
+def build_catalogue(records: list[str]) -> dict[str, list]:
+    """Return the discovered readings as {id: [marker, sample value]}."""
+    catalogue = {}
+    for record in records:
+        reading = parse_record(record)
+        if reading is not None:
+            catalogue[reading.id] = [reading.marker, reading.value]
+    return catalogue
+
+
+class ReadingIndex:
+    """Map reading IDs to stable slots of a snapshot list.
+
+    Entities resolve their slot once at setup and then read the snapshot by
+    position instead of looking their reading up by ID on every access.
+    """
+
+    def __init__(self):
+        """Initialize the index."""
+        self._slots = {}
+        self.ids = []
+
+    def slot(self, reading_id: str) -> int:
+        """Return the slot of a reading ID, assigning one if needed."""
+        slot = self._slots.get(reading_id)
+        if slot is None:
+            slot = len(self.ids)
+            self._slots[reading_id] = slot
+            self.ids.append(reading_id)
+        return slot
+
+    def get(self, reading_id: str) -> int | None:
+        """Return the slot of a reading ID or None if it is unknown."""
+        return self._slots.get(reading_id)
+
+    def __contains__(self, reading_id: str) -> bool:
+        return reading_id in self._slots
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def restore(self, readings: dict[str, list]) -> list:
+        """Return a snapshot built from {id: [marker, value]}."""
+        snapshot = [None] * len(self.ids)
+        for reading_id, (marker, value) in readings.items():
+            slot = self.slot(reading_id)
+            if slot >= len(snapshot):
+                snapshot.extend([None] * (slot + 1 - len(snapshot)))
+            snapshot[slot] = Reading(marker, reading_id, value)
+        return snapshot
+
+    def merge(self, snapshot: list | None, records: list[str]) -> list:
+        """Return a copy of the snapshot updated with the parsed records."""
+        snapshot = [] if snapshot is None else list(snapshot)
+        for record in records:
+            reading = parse_record(record)
+            if reading is None:
+                continue
+            slot = self.slot(reading.id)
+            if slot >= len(snapshot):
+                snapshot.extend([None] * (slot + 1 - len(snapshot)))
+            snapshot[slot] = reading
+        return snapshot
+
+
+def build_write_frame(values: dict[str, int], marker: str = "B") -> bytes:
+    """Build a single SEC frame writing all values at once."""
+    records = "".join(
+        f',"{marker}{reading_id}{str(value).zfill(12)}"'
+        for reading_id, value in values.items()
+    )
+    return f'["SEC","{len(values)}"{records}]'.encode()
+
+
+def build_read_frames(
+    reading_ids: list[str], max_items: int = MAX_QUERY_ITEMS
+) -> list[bytes]:
+    """Build SEC frames querying only the given readings.
+
+    Each frame asks for at most ``max_items`` readings so request and reply
+    stay within a single socket buffer.
+    """
+    frames = []
+    for start in range(0, len(reading_ids), max_items):
+        chunk = reading_ids[start:start + max_items]
+        records = "".join(f',"I{reading_id}{"0" * 12}"' for reading_id in chunk)
+        frames.append(f'["SEC","{len(chunk)}"{records}]'.encode())
+    return frames
+
+
+class CommandResult:
+    """Outcome of a command sent to the stove."""
+
+    __slots__ = ("ok", "attempts", "records", "error")
+
+    def __init__(self, ok: bool, attempts: int, records: list[str], error: str = None):
+        """Initialize the result."""
+        self.ok = ok
+        self.attempts = attempts
+        self.records = records
+        self.error = error
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandResult(ok={self.ok!r}, attempts={self.attempts!r}, "
+            f"error={self.error!r})"
+        )
+
+
+def check_ack(sent: list[str], reply: list[str]) -> str | None:
+    """Check the SEC acknowledgement of a command, return the problem if any.
+
+    The stove answers a command with a SEC frame repeating the records it
+    accepted, a write is only acknowledged with its value. Records of the
+    legacy command set carry no reading ID, for those only the frame type
+    is checked.
+    """
+    if len(reply) == 0 or reply[0] != RESULT_VALS:
+        return f"Stove rejected the command: {reply}"
+    acked = {
+        (reading.marker, reading.id, reading.value)
+        for reading in map(parse_record, reply[2:])
+        if reading is not None
+    }
+    missing = [
+        record
+        for record, reading in zip(sent[2:], map(parse_record, sent[2:]))
+        if reading is not None
+        and (reading.marker, reading.id, reading.value) not in acked
+    ]
+    if missing:
+        return f"Stove did not acknowledge {missing}: {reply}"
+    return None
+
+
+def reply_matches(query: list[str], reply: list[str]) -> bool:
+    """Return whether a frame is the reply to a query.
+
+    A SEL query is answered with SEL or ERR. A SEC query is answered with
+    ERR or a SEC frame whose records all belong to readings of the query, a
+    SEC frame about other readings was pushed by the stove on its own.
+    """
+    if len(reply) == 0:
+        return False
+    if reply[0] == RESULT_ERROR:
+        return True
+    if reply[0] != query[0]:
+        return False
+    if query[0] != RESULT_VALS:
+        return True
+    asked = {record[1:6] for record in query[2:] if len(record) > 5}
+    if len(asked) == 0:
+        return True
+    answered = [record[1:6] for record in reply[2:] if len(record) > 5]
+    return len(answered) > 0 and all(reading_id in asked for reading_id in answered)
@@ -0,0 +1,98 @@
+"""Shared poll scheduler for all 4Heat stoves."""
+import asyncio
+from contextlib import asynccontextmanager
+import time
+
+from .const import DEFAULT_MAX_CONCURRENT, POLL_SPACING
+
+
+class FourHeatPollScheduler:
+    """Spread polls of all stoves and cap concurrent connections.
+
+    Every coordinator polls through a slot of this scheduler. Each stove gets
+    its own phase within its poll interval, so n stoves polling every
+    interval start evenly spread over it instead of all at once. Poll starts
+    are also kept at least POLL_SPACING seconds apart, and no more than
+    ``limit`` requests are in flight at the same time, whether they are
+    polls or commands.
+    """
+
+    def __init__(
+        self, limit: int = DEFAULT_MAX_CONCURRENT, spacing: float = POLL_SPACING
+    ):
+        """Initialize the scheduler."""
+        self._limit = limit
+        self._spacing = spacing
+        self._semaphore = asyncio.Semaphore(limit)
+        self._stoves = set()
+        self._next_start = 0.0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._polls = 0
+        self._commands = 0
+        self._failures = 0
+        self._wait_time = 0.0
+
+    def register(self, stove_id: str) -> None:
+        """Register a stove."""
+        self._stoves.add(stove_id)
+
+    def unregister(self, stove_id: str) -> None:
+        """Forget a stove."""
+        self._stoves.discard(stove_id)
+
+    def next_delay(self, stove_id: str, interval: float) -> float:
+        """Return the delay to the next poll of a stove, aligned to its phase.
+
+        The delay is between half and one and a half intervals, so an
+        adaptive interval still takes effect right away.
+        """
+        stoves = sorted(self._stoves)
+        if stove_id not in stoves or len(stoves) < 2 or interval <= 0:
+            return interval
+        offset = interval * stoves.index(stove_id) / len(stoves)
+        now = time.monotonic()
+        start = now - now % interval + offset
+        while start < now + interval / 2:
+            start += interval
+        return start - now
+
+    @property
+    def metrics(self) -> dict:
+        """Return aggregate metrics of all stoves."""
+        return {
+            "stoves": len(self._stoves),
+            "limit": self._limit,
+            "in_flight": self._in_flight,
+            "max_in_flight": self._max_in_flight,
+            "polls": self._polls,
+            "commands": self._commands,
+            "failures": self._failures,
+            "wait_time": round(self._wait_time, 3),
+        }
+
+    @asynccontextmanager
+    async def async_slot(self, poll: bool = True):
+        """Wait for a free connection slot; polls are also spaced out."""
+        start = time.monotonic()
+        if poll:
+            begin = max(start, self._next_start)
+            self._next_start = begin + self._spacing
+            if begin > start:
+                await asyncio.sleep(begin - start)
+
+        async with self._semaphore:
+            self._wait_time += time.monotonic() - start
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            if poll:
+                self._polls += 1
+            else:
+                self._commands += 1
+            try:
+                yield
+            except Exception:
+                self._failures += 1
+                raise
+            finally:
+                self._in_flight -= 1
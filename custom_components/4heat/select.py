@@ -0,0 +1,97 @@
+"""The 4Heat integration."""
+
+import logging
+from homeassistant.components.select import SelectEntity
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    SENSOR_TYPES, SELECT_TYPES, DOMAIN, DATA_COORDINATOR, SIGNAL_OPTIONS_UPDATED
+)
+from .coordinator import FourHeatDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    """Add an FourHeat entry."""
+    coordinator: FourHeatDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
+        DATA_COORDINATOR
+    ]
+    entities = {}
+
+    @callback
+    def async_update_entities():
+        """Add the registers the stove reports as settable."""
+        new_entities = []
+        for sensorId in SELECT_TYPES:
+            if sensorId in entities or not coordinator.is_writable(sensorId):
+                continue
+            entities[sensorId] = FourHeatSelect(coordinator, sensorId, entry.title)
+            new_entities.append(entities[sensorId])
+        if new_entities:
+            async_add_entities(new_entities)
+
+    async_update_entities()
+    entry.async_on_unload(coordinator.async_add_listener(async_update_entities))
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id), async_update_entities
+        )
+    )
+
+
+class FourHeatSelect(CoordinatorEntity, SelectEntity):
+    """Settable register of a 4Heat device with named values."""
+
+    def __init__(self, coordinator, sensor_type, name):
+        """Initialize the select."""
+        super().__init__(coordinator, context=coordinator.index.slot(sensor_type))
+        self._sensor = SENSOR_TYPES[sensor_type].name
+        self._name = name
+        self.type = sensor_type
+        self.coordinator = coordinator
+        self._slot = self.coordinator_context
+        self.serial_number = coordinator.serial_number
+        self.model = coordinator.model
+        self._names = SELECT_TYPES[sensor_type]
+        self._values = {option: value for value, option in self._names.items()}
+        self._attr_options = list(self._values)
+
+    @property
+    def name(self):
+        """Return the name of the select."""
+        return f"{self._name} {self._sensor}"
+
+    @property
+    def available(self):
+        """Return True while the reading is recent enough."""
+        return self.coordinator.is_available(self._slot)
+
+    @property
+    def current_option(self):
+        """Return the name of the current value."""
+        reading = self.coordinator.reading(self._slot)
+        if reading is None:
+            return None
+        return self._names.get(reading.value)
+
+    async def async_select_option(self, option: str) -> None:
+        """Write the value of an option."""
+        await self.coordinator.async_set_value(self.type, self._values[option])
+
+    @property
+    def unique_id(self):
+        """Return unique id based on device serial and variable."""
+        return f"{self._name}_{self.type}"
+
+    @property
+    def device_info(self):
+        """Return information about the device."""
+        return {
+            "identifiers": {(DOMAIN, self.serial_number)},
+            "name": self._name,
+            "manufacturer": "4Heat",
+            "model": self.model,
+        }
@@ -1,14 +1,21 @@
 """The 4Heat integration."""
 
 import logging
-from homeassistant.const import CONF_MONITORED_CONDITIONS
+import time
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
-    MODE_NAMES, ERROR_NAMES, POWER_NAMES,
-    MODE_TYPE, ERROR_TYPE, POWER_TYPE,
-    SENSOR_TYPES, DOMAIN, DATA_COORDINATOR,
-    ATTR_MARKER, ATTR_NUM_VAL, ATTR_READING_ID, ATTR_STOVE_ID
+    MODE_TYPE, ERROR_TYPE, POWER_TYPE, FourHeatSensorEntityDescription,
+    SENSOR_TYPES, STATS_SENSOR_TYPES, DOMAIN, DATA_COORDINATOR,
+    SIGNAL_OPTIONS_UPDATED,
+    ATTR_MARKER, ATTR_NUM_VAL, ATTR_READING_ID, ATTR_STOVE_ID, ATTR_STALE,
+    ATTR_MIN, ATTR_MAX, ATTR_RATE
 )
 from .coordinator import FourHeatDataUpdateCoordinator
 
@@ -20,80 +27,152 @@ async def async_setup_entry(hass, entry, async_add_entities):
     coordinator: FourHeatDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
         DATA_COORDINATOR
     ]
-    entities = []
-    sensorIds = entry.data[CONF_MONITORED_CONDITIONS]
+    entities = {}
 
-    for sensorId in sensorIds:
-        if len(sensorId) > 5:
+    @callback
+    def async_update_entities():
+        """Add and remove sensors to match the monitored readings."""
+        wanted = list(coordinator.monitored_ids)
+        if coordinator.stats is not None:
+            wanted.extend(f"stats_{key}" for key in STATS_SENSOR_TYPES)
+
+        new_entities = []
+        for sId in wanted:
+            if sId in entities:
+                continue
             try:
-                sId = sensorId[1:6]
-                entities.append(FourHeatDevice(coordinator, sId, entry.title))
+                if sId.startswith("stats_"):
+                    entity = FourHeatStatsSensor(coordinator, sId[6:], entry.title)
+                else:
+                    entity = FourHeatDevice(coordinator, sId, entry.title)
             except:
-                _LOGGER.debug(f"Error adding {sensorId}")
+                _LOGGER.debug(f"Error adding {sId}")
+                continue
+            entities[sId] = entity
+            new_entities.append(entity)
+
+        registry = entity_registry.async_get(hass)
+        for sId in [sId for sId in entities if sId not in wanted]:
+            entity = entities.pop(sId)
+            if entity.entity_id and registry.async_get(entity.entity_id):
+                registry.async_remove(entity.entity_id)
+            else:
+                hass.async_create_task(entity.async_remove())
+
+        async_add_entities(new_entities)
 
-    async_add_entities(entities)
+    async_update_entities()
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id), async_update_entities
+        )
+    )
 
 
-class FourHeatDevice(CoordinatorEntity):
+class FourHeatDevice(CoordinatorEntity, SensorEntity):
     """Representation of a 4Heat device."""
 
+    entity_description: FourHeatSensorEntityDescription
+
     def __init__(self, coordinator, sensor_type, name):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=coordinator.index.slot(sensor_type))
         if sensor_type not in SENSOR_TYPES:
             _LOGGER.error(f"Sensor '{sensor_type}' unkonwn, notify maintainer.")
-            SENSOR_TYPES[sensor_type] = [f"UN {sensor_type}", None, ""]
-        self._sensor = SENSOR_TYPES[sensor_type][0]
+            SENSOR_TYPES[sensor_type] = FourHeatSensorEntityDescription(
+                key=sensor_type, name=f"UN {sensor_type}"
+            )
+        self.entity_description = SENSOR_TYPES[sensor_type]
+        self._sensor = self.entity_description.name
         self._name = name
         self.type = sensor_type
         self.coordinator = coordinator
-        self._last_value = None
+        self._slot = self.coordinator_context
+        self._decoded = sensor_type in (MODE_TYPE, ERROR_TYPE, POWER_TYPE)
         self.serial_number = coordinator.serial_number
         self.model = coordinator.model
-        self._unit_of_measurement = SENSOR_TYPES[self.type][1]
-        self._icon = SENSOR_TYPES[self.type][2]
+        self._written = None
+        self._written_at = 0.0
+        self._written_available = None
+        self._pending_unsub = None
         _LOGGER.debug(self.coordinator)
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state unless the change is too small or too soon.
+
+        A change held back by the minimum interval is written once the
+        interval has passed, one within the deadband is dropped.
+        """
+        if self._pending_unsub is not None:
+            self._pending_unsub()
+            self._pending_unsub = None
+
+        description = self.entity_description
+        value = self.native_value
+        available = self.available
+        now = time.monotonic()
+        if (
+            description.deadband is not None
+            and self.coordinator.filters
+            and value is not None
+            and self._written is not None
+            and available == self._written_available
+        ):
+            if abs(value - self._written) < description.deadband:
+                return
+            interval = self.coordinator.filter_interval or description.min_interval
+            wait = self._written_at + interval - now
+            if wait > 0:
+                self._pending_unsub = async_call_later(
+                    self.hass, wait, self._async_write_pending
+                )
+                return
+
+        if value is not None:
+            self._written = value
+        self._written_at = now
+        self._written_available = available
+        self.async_write_ha_state()
+
+    @callback
+    def _async_write_pending(self, _now) -> None:
+        self._pending_unsub = None
+        self._handle_coordinator_update()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending write."""
+        await super().async_will_remove_from_hass()
+        if self._pending_unsub is not None:
+            self._pending_unsub()
+            self._pending_unsub = None
+
     @property
     def name(self):
         """Return the name of the sensor."""
         return f"{self._name} {self._sensor}"
 
     @property
-    def state(self):
-        """Return the state of the device."""
-        if self.type not in self.coordinator.data: 
+    def native_value(self):
+        """Return the decoded name or the scaled value of the reading."""
+        reading = self.coordinator.reading(self._slot)
+        if reading is None:
             return None
-        try:
-            if self.type == MODE_TYPE:
-                state = MODE_NAMES[self.coordinator.data[self.type][0]]
-            elif self.type == ERROR_TYPE:
-                state = ERROR_NAMES[self.coordinator.data[self.type][0]]
-            elif self.type == POWER_TYPE:
-                state = POWER_NAMES[self.coordinator.data[self.type][0]]
-            else:
-                state = self.coordinator.data[self.type][0]
+        if self._decoded:
+            return reading.text
+        if self.entity_description.scale != 1:
+            return reading.value * self.entity_description.scale
+        return reading.value
 
-            self._last_value = state
-        except Exception as ex:
-            _LOGGER.error(ex)
-            state = self._last_value
-        return state
+    @property
+    def available(self):
+        """Return True while the reading is recent enough."""
+        return self.coordinator.is_available(self._slot)
 
     @property
     def maker(self):
         """Maker information"""
-        return self.coordinator.data[self.type][1]
-
-    @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement this sensor expresses itself in."""
-        return self._unit_of_measurement
-
-    @property
-    def icon(self):
-        """Return icon."""
-        return self._icon
+        return self.coordinator.reading(self._slot).marker
 
     @property
     def unique_id(self):
@@ -111,17 +190,70 @@ class FourHeatDevice(CoordinatorEntity):
         }
 
     @property
-    def state_attributes(self):
-        try:
-            val = {ATTR_MARKER: self.coordinator.data[self.type][1]}
-            val[ATTR_READING_ID] = self.type
-            val[ATTR_STOVE_ID] = self.coordinator.stove_id
-
-            if self.type == MODE_TYPE or self.type == ERROR_TYPE or self.type == POWER_TYPE:
-                val[ATTR_NUM_VAL] = self.coordinator.data[self.type][0]
-                
-            return val
-
-        except Exception as ex:
-            _LOGGER.error(ex)
-            return None
\ No newline at end of file
+    def extra_state_attributes(self):
+        reading = self.coordinator.reading(self._slot)
+        if reading is None:
+            return None
+
+        val = {ATTR_MARKER: reading.marker}
+        val[ATTR_READING_ID] = self.type
+        val[ATTR_STOVE_ID] = self.coordinator.stove_id
+        val[ATTR_STALE] = self.coordinator.stale
+
+        if self._decoded:
+            val[ATTR_NUM_VAL] = reading.value
+
+        summary = self.coordinator.history_summary(self.type)
+        if summary is not None:
+            val[ATTR_MIN] = summary["min"]
+            val[ATTR_MAX] = summary["max"]
+            val[ATTR_RATE] = summary["rate"]
+
+        return val
+
+
+class FourHeatStatsSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for the instrumentation of a stove."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, key, name):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._key = key
+        self._name = name
+        self._sensor = STATS_SENSOR_TYPES[key][0]
+        self._attr_native_unit_of_measurement = STATS_SENSOR_TYPES[key][1]
+        self._icon = STATS_SENSOR_TYPES[key][2]
+        self._attr_state_class = STATS_SENSOR_TYPES[key][3]
+        self.serial_number = coordinator.serial_number
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} {self._sensor}"
+
+    @property
+    def native_value(self):
+        """Return the current value of the counter."""
+        if self.coordinator.stats is None:
+            return None
+        value = getattr(self.coordinator.stats, self._key)
+        if isinstance(value, float):
+            return round(value, 3)
+        return value
+
+    @property
+    def icon(self):
+        """Return icon."""
+        return self._icon
+
+    @property
+    def unique_id(self):
+        """Return unique id based on device serial and counter."""
+        return f"{self._name}_stats_{self._key}"
+
+    @property
+    def device_info(self):
+        """Return information about the device."""
+        return {"identifiers": {(DOMAIN, self.serial_number)}}
@@ -0,0 +1,127 @@
+"""Hot path instrumentation for the 4Heat integration."""
+import asyncio
+from bisect import bisect_left
+
+# Upper bucket bounds in milliseconds, the last bucket takes the rest
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Seconds between two wake-ups of the event loop lag probe
+LOOP_LAG_INTERVAL = 1.0
+
+PHASE_CONNECT = "connect"
+PHASE_SEND = "send"
+PHASE_RECV = "recv"
+# Splitting a reply into records, once per exchange
+PHASE_FRAME = "frame"
+# Merging the records of a poll into the snapshot, once per poll
+PHASE_MERGE = "merge"
+PHASE_DISPATCH = "dispatch"
+PHASE_POLL = "poll"
+# How late the event loop ran a timer, whoever blocked it
+PHASE_LOOP_LAG = "loop_lag"
+
+PHASES = (
+    PHASE_CONNECT, PHASE_SEND, PHASE_RECV, PHASE_FRAME, PHASE_MERGE,
+    PHASE_DISPATCH, PHASE_POLL, PHASE_LOOP_LAG,
+)
+
+
+class Histogram:
+    """Fixed bucket histogram of durations."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        """Initialize the histogram."""
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record a duration."""
+        ms = seconds * 1000
+        self.counts[bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def as_dict(self) -> dict:
+        """Return the histogram for diagnostics."""
+        buckets = {f"<={bound}ms": n for bound, n in zip(BUCKETS, self.counts)}
+        buckets[f">{BUCKETS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "max_ms": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+class FourHeatStats:
+    """Timings and counters of a single stove.
+
+    Only created when instrumentation is enabled; every caller checks for
+    None first so a disabled stove pays nothing.
+    """
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.bytes_received = 0
+        self.requests = 0
+        self.retries = 0
+        self.polls = 0
+        self.err_fallbacks = 0
+        self.last_poll = None
+        self._loop = None
+        self._lag_handle = None
+        self._lag_due = 0.0
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Record the duration of a phase."""
+        self.phases[phase].add(seconds)
+        if phase == PHASE_POLL:
+            self.last_poll = seconds * 1000
+
+    def start_loop_probe(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Measure how late the event loop runs a timer, until stopped."""
+        self._loop = loop
+        self._schedule_loop_probe()
+
+    def stop_loop_probe(self) -> None:
+        """Stop measuring the event loop lag."""
+        if self._lag_handle is not None:
+            self._lag_handle.cancel()
+            self._lag_handle = None
+
+    def _schedule_loop_probe(self) -> None:
+        self._lag_due = self._loop.time() + LOOP_LAG_INTERVAL
+        self._lag_handle = self._loop.call_at(self._lag_due, self._loop_probe)
+
+    def _loop_probe(self) -> None:
+        self.phases[PHASE_LOOP_LAG].add(max(0.0, self._loop.time() - self._lag_due))
+        self._schedule_loop_probe()
+
+    @property
+    def err_fallback_rate(self) -> float | None:
+        """Return the share of polls that needed the ERR fallback."""
+        if self.polls == 0:
+            return None
+        return self.err_fallbacks / self.polls
+
+    def as_dict(self) -> dict:
+        """Return all counters for diagnostics."""
+        return {
+            "bytes_received": self.bytes_received,
+            "requests": self.requests,
+            "retries": self.retries,
+            "polls": self.polls,
+            "err_fallbacks": self.err_fallbacks,
+            "err_fallback_rate": self.err_fallback_rate,
+            "last_poll_ms": self.last_poll,
+            "phases": {
+                phase: histogram.as_dict()
+                for phase, histogram in self.phases.items()
+            },
+        }
@@ -2,10 +2,13 @@
 
 import logging
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
-    MODE_NAMES, SENSOR_TYPES, DOMAIN, DATA_COORDINATOR, MODE_TYPE, ERROR_TYPE
+    SENSOR_TYPES, DOMAIN, DATA_COORDINATOR, MODE_TYPE, ERROR_TYPE, SWITCH_OFF_MODES,
+    OPTIMISTIC_TIMEOUT,
 )
 from .coordinator import FourHeatDataUpdateCoordinator
 
@@ -33,14 +36,16 @@ class FourHeatSwitch(CoordinatorEntity, SwitchEntity):
 
     def __init__(self, coordinator, sensor_type, name):
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._sensor = SENSOR_TYPES[sensor_type][0]
+        super().__init__(coordinator, context=coordinator.index.slot(sensor_type))
+        self._sensor = SENSOR_TYPES[sensor_type].name
         self._name = name
         self.type = sensor_type
         self.coordinator = coordinator
-        self._last_value = None
+        self._slot = self.coordinator_context
         self.serial_number = coordinator.serial_number
         self.model = coordinator.model
+        self._optimistic_on = None
+        self._optimistic_unsub = None
         _LOGGER.debug(self.coordinator)
 
     @property
@@ -49,33 +54,81 @@ class FourHeatSwitch(CoordinatorEntity, SwitchEntity):
         return f"{self._name} {self._sensor}"
 
     @property
-    def is_on(self):
-        """Return true if switch is on."""
-        if self.type not in self.coordinator.data: 
+    def available(self):
+        """Return True while the reading is recent enough."""
+        return self.coordinator.is_available(self._slot)
+
+    def _reported_on(self):
+        reading = self.coordinator.reading(self._slot)
+        if reading is None:
             return False
         if self.type == MODE_TYPE:
-            return self.coordinator.data[self.type][0] not in [0,7,8,9]
+            return reading.value not in SWITCH_OFF_MODES
         elif self.type == ERROR_TYPE:
-            return self.coordinator.data[self.type][0] != 0
+            return reading.value != 0
+
+    @property
+    def is_on(self):
+        """Return true if switch is on."""
+        if self._optimistic_on is not None:
+            return self._optimistic_on
+        return self._reported_on()
 
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
         if self.type == MODE_TYPE:
             await self.coordinator.async_turn_on()
+            self._set_optimistic(True)
         elif self.type == ERROR_TYPE:
             None
-        await self.coordinator.async_request_refresh()
-        self.async_write_ha_state()
 
     async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
         if self.type == MODE_TYPE:
             await self.coordinator.async_turn_off()
+            self._set_optimistic(False)
         elif self.type == ERROR_TYPE:
             await self.coordinator.async_unblock()
-        await self.coordinator.async_request_refresh()
+
+    @callback
+    def _set_optimistic(self, on):
+        """Show the commanded state until the stove reports it or it times out.
+
+        The stove goes through several modes while starting or stopping, so
+        the mode reading itself is left alone.
+        """
+        self._cancel_optimistic()
+        if self._reported_on() == on:
+            return
+        self._optimistic_on = on
+        self._optimistic_unsub = async_call_later(
+            self.hass, OPTIMISTIC_TIMEOUT, self._optimistic_expired
+        )
+        self.async_write_ha_state()
+
+    @callback
+    def _cancel_optimistic(self):
+        self._optimistic_on = None
+        if self._optimistic_unsub is not None:
+            self._optimistic_unsub()
+            self._optimistic_unsub = None
+
+    @callback
+    def _optimistic_expired(self, _now):
+        self._optimistic_unsub = None
+        self._optimistic_on = None
         self.async_write_ha_state()
 
+    @callback
+    def _handle_coordinator_update(self):
+        if self._optimistic_on is not None and self._reported_on() == self._optimistic_on:
+            self._cancel_optimistic()
+        super()._handle_coordinator_update()
+
+    async def async_will_remove_from_hass(self):
+        self._cancel_optimistic()
+        await super().async_will_remove_from_hass()
+
 
     @property
     def unique_id(self):
@@ -94,17 +147,15 @@ class FourHeatSwitch(CoordinatorEntity, SwitchEntity):
 
     @property
     def state_attributes(self):
-        try:
-            if self.type == MODE_TYPE:
-                return {
-                    "Num Val": self.coordinator.data[self.type][0],
-                    "Val text": MODE_NAMES[self.coordinator.data[self.type][0]]
-                }
-            elif self.type == ERROR_TYPE:
-                return {"Num Val": self.coordinator.data[self.type][0]}
-            else:
-                return None
-
-        except Exception as ex:
-            _LOGGER.error(ex)
-            return None
\ No newline at end of file
+        reading = self.coordinator.reading(self._slot)
+        if reading is None:
+            return None
+        if self.type == MODE_TYPE:
+            return {
+                "Num Val": reading.value,
+                "Val text": reading.text
+            }
+        elif self.type == ERROR_TYPE:
+            return {"Num Val": reading.value}
+        else:
+            return None
@@ -0,0 +1,426 @@
+"""Asyncio transport for the 4Heat stove protocol."""
+import asyncio
+import logging
+import socket
+import time
+
+from .const import (
+    TCP_PORT, SOCKET_BUFFER, CONNECT_TIMEOUT, READ_TIMEOUT, MAX_FRAME_SIZE,
+    RECONNECT_MAX_DELAY, PERSISTENT_MAX_DROPS
+)
+from .protocol import reply_matches
+from .stats import PHASE_CONNECT, PHASE_SEND, PHASE_RECV, PHASE_FRAME
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FourHeatTransportError(Exception):
+    """Raised when the stove can not be reached or does not answer."""
+
+
+class FrameParser:
+    """Incrementally split a stove reply into its quoted records.
+
+    The stove answers with a JSON-like array of strings, e.g.
+    ``["SEL","2","J30001000000000000","J30002000000000000"]``. Chunks are fed
+    as they arrive and every record is stored as soon as its closing quote
+    is seen, so a reply spread over several reads is parsed in one pass.
+    """
+
+    def __init__(self, max_size: int = MAX_FRAME_SIZE):
+        """Initialize the parser."""
+        self.items = []
+        self.complete = False
+        self.remainder = b""
+        self._max_size = max_size
+        self._size = 0
+        self._started = False
+        self._partial = None
+
+    @property
+    def pending(self) -> bool:
+        """Return True while a frame was started but not completed."""
+        return self._started and not self.complete
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse a chunk, return True once the closing bracket was seen."""
+        self._size += len(chunk)
+        if self._size > self._max_size:
+            raise FourHeatTransportError(
+                f"Frame exceeds {self._max_size} bytes"
+            )
+
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            if self._partial is not None:
+                quote = chunk.find(b'"', pos)
+                if quote < 0:
+                    self._partial += chunk[pos:]
+                    break
+                self.items.append((self._partial + chunk[pos:quote]).decode())
+                self._partial = None
+                pos = quote + 1
+            elif not self._started:
+                bracket = chunk.find(b"[", pos)
+                if bracket < 0:
+                    break
+                self._started = True
+                pos = bracket + 1
+            else:
+                char = chunk[pos]
+                pos += 1
+                if char == 0x22:  # "
+                    self._partial = b""
+                elif char == 0x5D:  # ]
+                    self.complete = True
+                    self.remainder = chunk[pos:]
+                    return True
+        return False
+
+
+class FourHeatTransport:
+    """Exchange frames with a single stove without blocking the event loop.
+
+    By default every request uses its own TCP connection. In persistent mode
+    one connection is kept open and reused; it is re-established with
+    backoff when the stove drops it, and the transport falls back to one
+    connection per request for firmware that closes after every reply.
+
+    Frames that do not answer the pending query were sent by the stove on
+    its own. They are passed to ``on_unsolicited``, and while the kept-open
+    connection is idle an idle reader takes them off the socket so they
+    never end up in front of the reply to the next query.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = TCP_PORT,
+        *,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_frame_size: int = MAX_FRAME_SIZE,
+        persistent: bool = False,
+        stats=None,
+        on_unsolicited=None,
+    ):
+        """Initialize the transport."""
+        self._host = host
+        self._port = port
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._max_frame_size = max_frame_size
+        self._persistent = persistent
+        self.stats = stats
+        self.on_unsolicited = on_unsolicited
+        self._idle_task = None
+        self._idle_parser = FrameParser(max_frame_size)
+        self._leftover = b""
+        self._lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self._reused = False
+        self._drops = 0
+        self._connect_failures = 0
+        self._next_connect = 0.0
+
+    @property
+    def host(self) -> str:
+        """Return the host of the stove."""
+        return self._host
+
+    @property
+    def port(self) -> int:
+        """Return the port of the stove."""
+        return self._port
+
+    @property
+    def persistent(self) -> bool:
+        """Return True if the connection is kept open between requests."""
+        return self._persistent
+
+    async def async_set_persistent(self, persistent: bool) -> None:
+        """Switch between a kept-open connection and one per request."""
+        async with self._lock:
+            if not persistent:
+                await self._async_stop_idle()
+                self._close()
+            self._persistent = persistent
+            self._drops = 0
+
+    async def async_request(self, query: bytes) -> list[str]:
+        """Send a query and return the records of the reply."""
+        async with self._lock:
+            if not self._persistent:
+                return await self._async_single_request(query)
+            await self._async_stop_idle()
+            try:
+                return await self._async_persistent_request(query)
+            finally:
+                self._start_idle()
+
+    async def async_close(self) -> None:
+        """Close the persistent connection."""
+        async with self._lock:
+            await self._async_stop_idle()
+            self._close()
+
+    def _start_idle(self) -> None:
+        """Read unsolicited frames from the kept-open connection."""
+        leftover, self._leftover = self._leftover, b""
+        if self._writer is None or self._writer.is_closing():
+            return
+        if leftover:
+            self._feed_unsolicited(leftover)
+        self._idle_task = asyncio.get_running_loop().create_task(
+            self._async_idle_read(self._reader)
+        )
+
+    async def _async_stop_idle(self) -> None:
+        """Stop the idle reader, finishing a frame it is in the middle of."""
+        task, self._idle_task = self._idle_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        if not self._idle_parser.pending or self._reader is None:
+            return
+        try:
+            while self._idle_parser.pending:
+                chunk = await asyncio.wait_for(
+                    self._reader.read(SOCKET_BUFFER), self._read_timeout
+                )
+                if not chunk:
+                    break
+                self._feed_unsolicited(chunk)
+        except (OSError, asyncio.TimeoutError, FourHeatTransportError):
+            pass
+        if self._idle_parser.pending:
+            _LOGGER.debug(f"Dropping an incomplete frame from {self._host}")
+            self._idle_parser = FrameParser(self._max_frame_size)
+            self._close()
+
+    async def _async_idle_read(self, reader) -> None:
+        """Take unsolicited frames off the socket between two requests.
+
+        A closed connection is left for the next request to notice.
+        """
+        try:
+            while True:
+                chunk = await reader.read(SOCKET_BUFFER)
+                if not chunk:
+                    return
+                self._feed_unsolicited(chunk)
+        except (OSError, FourHeatTransportError) as error:
+            _LOGGER.debug(f"Idle connection to {self._host} failed: {error!r}")
+            self._idle_parser = FrameParser(self._max_frame_size)
+
+    def _feed_unsolicited(self, chunk: bytes) -> None:
+        """Parse bytes nobody asked for and pass on the complete frames."""
+        while self._idle_parser.feed(chunk):
+            self._unsolicited(self._idle_parser.items)
+            chunk = self._idle_parser.remainder
+            self._idle_parser = FrameParser(self._max_frame_size)
+
+    def _unsolicited(self, items: list[str]) -> None:
+        """Hand on a frame that was not the reply to a query."""
+        _LOGGER.debug(f"Unsolicited frame from {self._host}: {items}")
+        if self.on_unsolicited is not None:
+            self.on_unsolicited(items)
+
+    def _take_reply(self, parser, chunk: bytes, query: list[str]):
+        """Feed a chunk, return the parser and the reply once it is complete.
+
+        Complete frames that do not answer the query are handed on as
+        unsolicited, bytes following the reply are kept for the idle reader.
+        """
+        while parser.feed(chunk):
+            if reply_matches(query, parser.items):
+                self._leftover = parser.remainder
+                return parser, parser.items
+            self._unsolicited(parser.items)
+            chunk = parser.remainder
+            parser = FrameParser(self._max_frame_size)
+        return parser, None
+
+    async def _async_single_request(self, query: bytes) -> list[str]:
+        """Send a query over a connection of its own."""
+        reader, writer = await self._async_connect()
+        try:
+            return await self._async_exchange(reader, writer, query)
+        finally:
+            self._leftover = b""
+            writer.close()
+
+    async def _async_persistent_request(self, query: bytes) -> list[str]:
+        """Send a query over the kept-open connection."""
+        if self._writer is not None and (
+            self._writer.is_closing() or self._reader.at_eof()
+        ):
+            self._dropped()
+        if not self._persistent:
+            return await self._async_single_request(query)
+
+        if self._writer is None:
+            await self._async_open()
+
+        try:
+            items = await self._async_exchange(self._reader, self._writer, query)
+        except FourHeatTransportError:
+            if not self._reused:
+                self._close()
+                raise
+            # A reused connection may be half-open, retry once on a new one.
+            _LOGGER.debug(f"Connection to {self._host} went stale, reconnecting")
+            if self.stats is not None:
+                self.stats.retries += 1
+            self._dropped()
+            await self._async_open()
+            try:
+                items = await self._async_exchange(
+                    self._reader, self._writer, query
+                )
+            except FourHeatTransportError:
+                self._close()
+                raise
+            if not self._persistent:
+                self._close()
+                return items
+
+        if self._reused:
+            self._drops = 0
+        self._reused = True
+        return items
+
+    def _dropped(self) -> None:
+        """Handle a connection the stove closed between two requests."""
+        self._close()
+        self._drops += 1
+        if self._drops >= PERSISTENT_MAX_DROPS:
+            _LOGGER.info(
+                f"{self._host} closes the connection after every reply, "
+                "using one connection per request"
+            )
+            self._persistent = False
+
+    async def _async_open(self) -> None:
+        """Open the persistent connection, honouring the reconnect backoff.
+
+        While the backoff runs the request fails right away instead of
+        waiting, so it does not hold the lock or a scheduler slot.
+        """
+        delay = self._next_connect - time.monotonic()
+        if delay > 0:
+            raise FourHeatTransportError(
+                f"Not reconnecting to {self._host} for another {delay:.1f}s"
+            )
+
+        try:
+            self._reader, self._writer = await self._async_connect()
+        except FourHeatTransportError:
+            self._connect_failures += 1
+            self._next_connect = time.monotonic() + min(
+                2 ** self._connect_failures, RECONNECT_MAX_DELAY
+            )
+            raise
+
+        self._connect_failures = 0
+        self._reused = False
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    def _close(self) -> None:
+        """Drop the persistent connection."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+        self._reused = False
+        self._idle_parser = FrameParser(self._max_frame_size)
+
+    async def _async_connect(self):
+        """Open a connection to the stove."""
+        start = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port),
+                self._connect_timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as error:
+            raise FourHeatTransportError(
+                f"Connect to {self._host} failed: {error!r}"
+            ) from error
+        if self.stats is not None:
+            self.stats.add(PHASE_CONNECT, time.perf_counter() - start)
+        return connection
+
+    def _remaining(self, deadline: float) -> float:
+        """Return the time left until the deadline of an exchange."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return remaining
+
+    async def _async_exchange(self, reader, writer, query: bytes) -> list[str]:
+        """Write a query and read the framed reply.
+
+        The read timeout covers the whole exchange, so a stove sending
+        unsolicited frames or dribbling bytes can not hold the connection.
+        """
+        sent = FrameParser(self._max_frame_size)
+        sent.feed(query)
+        deadline = time.monotonic() + self._read_timeout
+        try:
+            reply = await self._async_send_and_read(
+                reader, writer, query, sent.items, deadline
+            )
+        except (OSError, asyncio.TimeoutError) as error:
+            raise FourHeatTransportError(
+                f"Read from {self._host} failed: {error!r}"
+            ) from error
+
+        _LOGGER.debug(f"Received from {self._host}: {reply}")
+        return reply
+
+    async def _async_send_and_read(
+        self, reader, writer, query, items, deadline
+    ) -> list[str]:
+        """Send a frame and read the reply, timing every phase if instrumented."""
+        stats = self.stats
+        if stats is not None:
+            stats.requests += 1
+            start = time.perf_counter()
+        writer.write(query)
+        await asyncio.wait_for(writer.drain(), self._remaining(deadline))
+        if stats is not None:
+            sent = time.perf_counter()
+            stats.add(PHASE_SEND, sent - start)
+
+        parser = FrameParser(self._max_frame_size)
+        framing = 0.0
+        reply = None
+        while reply is None:
+            chunk = await asyncio.wait_for(
+                reader.read(SOCKET_BUFFER), self._remaining(deadline)
+            )
+            if not chunk:
+                raise FourHeatTransportError(
+                    f"Truncated reply from {self._host}: {parser.items}"
+                )
+            if stats is None:
+                parser, reply = self._take_reply(parser, chunk, items)
+                continue
+            stats.bytes_received += len(chunk)
+            fed = time.perf_counter()
+            parser, reply = self._take_reply(parser, chunk, items)
+            framing += time.perf_counter() - fed
+
+        if stats is not None:
+            stats.add(PHASE_RECV, time.perf_counter() - sent - framing)
+            stats.add(PHASE_FRAME, framing)
+        return reply
@@ -0,0 +1,165 @@
+"""Benchmark the 4Heat hot path against simulated stoves.
+
+Run ``python scripts/benchmark.py --stoves 10 --polls 20`` from the
+repository root with Home Assistant installed. It reports the parse cost
+per record, poll latency percentiles, poll throughput across all stoves and
+the longest time the event loop was blocked.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulator import StoveSimulator  # noqa: E402
+
+const = importlib.import_module("custom_components.4heat.const")
+coordinator_module = importlib.import_module("custom_components.4heat.coordinator")
+protocol = importlib.import_module("custom_components.4heat.protocol")
+scheduler_module = importlib.import_module("custom_components.4heat.scheduler")
+transport = importlib.import_module("custom_components.4heat.transport")
+
+
+def _percentiles(samples: list[float]) -> str:
+    if len(samples) < 2:
+        return f"n={len(samples)}"
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return (
+        f"p50={cuts[49] * 1000:.2f}ms p90={cuts[89] * 1000:.2f}ms "
+        f"p99={cuts[98] * 1000:.2f}ms max={max(samples) * 1000:.2f}ms"
+    )
+
+
+def bench_parse(rounds: int) -> None:
+    """Measure framing and parsing of a full SEL reply."""
+    reply = StoveSimulator().reply(["SEL", "0"])
+    parser = transport.FrameParser()
+    parser.feed(reply)
+    records = parser.items
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        transport.FrameParser().feed(reply)
+    framing = time.perf_counter() - start
+
+    index = protocol.ReadingIndex()
+    snapshot = None
+    start = time.perf_counter()
+    for _ in range(rounds):
+        snapshot = index.merge(snapshot, records)
+    parsing = time.perf_counter() - start
+
+    per_record = len(records) * rounds
+    print(
+        f"parse: {len(records)} records, framing {framing / per_record * 1e6:.2f}us"
+        f"/record, parsing {parsing / per_record * 1e6:.2f}us/record"
+    )
+
+
+async def _async_loop_monitor(stop: asyncio.Event, lags: list[float]) -> None:
+    """Record how late the loop wakes up a sleeping task."""
+    interval = 0.005
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def _async_make_hass(config_dir: str, args):
+    from homeassistant.core import HomeAssistant
+
+    try:
+        hass = HomeAssistant(config_dir)
+    except TypeError:
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+    hass.data[const.DOMAIN] = {
+        const.DATA_SCHEDULER: scheduler_module.FourHeatPollScheduler(
+            args.limit, args.spacing
+        )
+    }
+    return hass
+
+
+async def async_bench_coordinators(args) -> None:
+    """Poll simulated stoves through the coordinator."""
+    from homeassistant.const import CONF_HOST, CONF_PORT
+
+    stoves = []
+    for _ in range(args.stoves):
+        stove = StoveSimulator(
+            latency=args.latency,
+            fragment=args.fragment,
+            truncate=args.truncate,
+            jitter=args.jitter,
+        )
+        await stove.async_start()
+        stoves.append(stove)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_make_hass(config_dir, args)
+        coordinators = [
+            coordinator_module.FourHeatDataUpdateCoordinator(
+                hass,
+                config={CONF_HOST: "127.0.0.1", CONF_PORT: stove.port},
+                options={const.CONF_PERSISTENT: args.persistent},
+                id=f"stove_{number}",
+            )
+            for number, stove in enumerate(stoves)
+        ]
+
+        latencies = []
+        lags = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_async_loop_monitor(stop, lags))
+
+        async def _async_poll(coordinator) -> None:
+            for _ in range(args.polls):
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_async_poll(c) for c in coordinators))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await monitor
+        for coordinator in coordinators:
+            await coordinator.async_close()
+        for stove in stoves:
+            await stove.async_stop()
+
+    total = args.stoves * args.polls
+    print(f"polls: {total} in {elapsed:.2f}s, {total / elapsed:.1f} polls/s")
+    print(f"poll latency: {_percentiles(latencies)}")
+    print(f"loop lag: {_percentiles(lags)}")
+    print(f"scheduler: {hass.data[const.DOMAIN][const.DATA_SCHEDULER].metrics}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stoves", type=int, default=5)
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--fragment", type=int, default=0)
+    parser.add_argument("--truncate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=int, default=0)
+    parser.add_argument("--persistent", action="store_true")
+    parser.add_argument("--limit", type=int, default=const.DEFAULT_MAX_CONCURRENT)
+    parser.add_argument("--spacing", type=float, default=0.0)
+    args = parser.parse_args()
+
+    bench_parse(args.rounds)
+    asyncio.run(async_bench_coordinators(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Stand-in server speaking the 4Heat stove protocol.
+
+Run ``python scripts/simulator.py --port 8080`` and point the integration at
+``127.0.0.1`` with that port to test without a physical stove. The server
+answers ``["SEL","0"]`` with the full register dump, ``I`` records of a SEC
+frame with the requested readings and applies ``B``/``J`` writes. With
+``--push`` every applied write is also sent as an unsolicited SEC frame to
+all open connections.
+"""
+import argparse
+import asyncio
+import logging
+import random
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_REGISTERS = {
+    "30001": ("J", 5),
+    "30002": ("J", 0),
+    "30003": ("J", 0),
+    "30004": ("J", 0),
+    "30005": ("J", 142),
+    "30006": ("J", 21),
+    "30007": ("J", 0),
+    "30008": ("J", 1450),
+    "30009": ("J", 0),
+    "30011": ("J", 3),
+    "30017": ("J", 62),
+    "30020": ("J", 1350),
+    "30025": ("J", 1448),
+    "30026": ("J", 42),
+    "30033": ("J", 35),
+    "20005": ("B", 30),
+    "20006": ("B", 80),
+    "20180": ("B", 65),
+    "20205": ("B", 50),
+    "20206": ("B", 80),
+    "20364": ("B", 3),
+    "20493": ("B", 21),
+}
+
+ON_ID = "30253"
+OFF_ID = "30254"
+UNBLOCK_ID = "30255"
+
+
+def _record(marker: str, reading_id: str, value: int) -> str:
+    return f"{marker}{reading_id}{str(value).zfill(12)}"
+
+
+def _frame(kind: str, records: list[str]) -> bytes:
+    items = "".join(f',"{record}"' for record in records)
+    return f'["{kind}","{len(records)}"{items}]'.encode()
+
+
+class StoveSimulator:
+    """Simulate a single stove on a local TCP port."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        fragment: int = 0,
+        truncate: float = 0.0,
+        hang: float = 0.0,
+        error: int = 0,
+        close_after_reply: bool = False,
+        jitter: int = 0,
+        push: bool = False,
+    ):
+        """Initialize the simulator.
+
+        ``fragment`` splits every reply into chunks of that many bytes,
+        ``truncate`` and ``hang`` are the probabilities of cutting a reply
+        short or never answering, ``error`` puts the stove into that error
+        state so SEL is answered with ERR.
+        """
+        self.registers = dict(DEFAULT_REGISTERS)
+        self.latency = latency
+        self.fragment = fragment
+        self.truncate = truncate
+        self.hang = hang
+        self.close_after_reply = close_after_reply
+        self.jitter = jitter
+        self.push = push
+        self.requests = 0
+        self.connections = 0
+        self._server = None
+        self._writers = set()
+        self._changed = set()
+        self.set_error(error)
+
+    @property
+    def port(self) -> int:
+        """Return the port the simulator listens on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    def set_error(self, error: int) -> None:
+        """Put the stove into an error state, 0 clears it."""
+        self.error = error
+        self.registers["30002"] = ("J", error)
+        if error:
+            self.registers["30001"] = ("J", 9)
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+
+    async def async_stop(self) -> None:
+        """Stop listening."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    def reply(self, items: list[str]) -> bytes:
+        """Return the reply to a parsed request frame."""
+        if items[:1] == ["SEL"]:
+            if self.error:
+                return _frame("ERR", [])
+            return _frame("SEL", [
+                _record(marker, reading_id, self._value(reading_id, value))
+                for reading_id, (marker, value) in self.registers.items()
+            ])
+
+        if items[:1] != ["SEC"]:
+            return _frame("ERR", [])
+
+        records = []
+        for item in items[2:]:
+            marker = item[0]
+            reading_id = item[1:6]
+            if marker == "I":
+                stored_marker, value = self.registers.get(reading_id, ("J", 0))
+                records.append(_record(
+                    stored_marker, reading_id, self._value(reading_id, value)
+                ))
+            elif marker in ("B", "J"):
+                records.append(item)
+                self._write(marker, reading_id, int(item[7:]))
+            elif item in ("0", "1"):
+                records.append(item)
+                self.registers["30001"] = ("J", 1 if item == "0" else 7)
+        return _frame("SEC", records)
+
+    def _value(self, reading_id: str, value: int) -> int:
+        if self.jitter and reading_id.startswith("300") and value > 10:
+            return value + random.randint(-self.jitter, self.jitter)
+        return value
+
+    def _write(self, marker: str, reading_id: str, value: int) -> None:
+        if reading_id == ON_ID:
+            self.registers["30001"] = ("J", 1)
+        elif reading_id == OFF_ID:
+            self.registers["30001"] = ("J", 7)
+        elif reading_id == UNBLOCK_ID:
+            self.set_error(0)
+            self.registers["30001"] = ("J", 0)
+        else:
+            self.registers[reading_id] = (marker, value)
+        self._changed.update((reading_id, "30001"))
+
+    def notify(self, reading_ids: list[str], exclude=None) -> None:
+        """Send the current values of readings to all other connections."""
+        records = []
+        for reading_id in reading_ids:
+            if reading_id in self.registers:
+                marker, value = self.registers[reading_id]
+                records.append(_record(marker, reading_id, value))
+        frame = _frame("SEC", records)
+        for writer in list(self._writers):
+            if writer is not exclude and not writer.is_closing():
+                writer.write(frame)
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        buffer = b""
+        try:
+            while True:
+                chunk = await reader.read(1024)
+                if not chunk:
+                    break
+                buffer += chunk
+                end = buffer.find(b"]")
+                if end < 0:
+                    continue
+                request, buffer = buffer[:end + 1], buffer[end + 1:]
+                self.requests += 1
+                items = [
+                    item.strip().strip('"')
+                    for item in request.decode().strip("[]").split(",")
+                ]
+
+                if self.hang and random.random() < self.hang:
+                    await asyncio.sleep(3600)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                data = self.reply(items)
+                if self.truncate and random.random() < self.truncate:
+                    writer.write(data[:len(data) // 2])
+                    await writer.drain()
+                    break
+
+                step = self.fragment or len(data)
+                for start in range(0, len(data), step):
+                    writer.write(data[start:start + step])
+                    await writer.drain()
+                    if self.fragment:
+                        await asyncio.sleep(0)
+
+                changed, self._changed = self._changed, set()
+                if self.push and changed:
+                    self.notify(sorted(changed), exclude=writer)
+
+                if self.close_after_reply:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def _async_main(args) -> None:
+    stove = StoveSimulator(
+        latency=args.latency,
+        fragment=args.fragment,
+        truncate=args.truncate,
+        hang=args.hang,
+        error=args.error,
+        close_after_reply=args.close_after_reply,
+        jitter=args.jitter,
+        push=args.push,
+    )
+    await stove.async_start(args.host, args.port)
+    _LOGGER.info(f"Simulated stove listening on {args.host}:{stove.port}")
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fragment", type=int, default=0)
+    parser.add_argument("--truncate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=0.0)
+    parser.add_argument("--error", type=int, default=0)
+    parser.add_argument("--jitter", type=int, default=0)
+    parser.add_argument("--close-after-reply", action="store_true")
+    parser.add_argument("--push", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Tests for the 4Heat integration."""
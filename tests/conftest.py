@@ -0,0 +1,83 @@
+"""Fixtures for the 4Heat tests."""
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+from homeassistant.const import CONF_HOST, CONF_MONITORED_CONDITIONS, CONF_PORT
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from simulator import StoveSimulator  # noqa: E402
+
+
+def integration(module: str):
+    """Import a module of the integration, its package name is no identifier."""
+    return importlib.import_module(f"custom_components.4heat.{module}")
+
+
+@pytest.fixture
+async def stove(socket_enabled):
+    """Run a simulated stove on a free local port."""
+    simulator = StoveSimulator()
+    await simulator.async_start()
+    yield simulator
+    await simulator.async_stop()
+
+
+@pytest.fixture
+async def make_coordinator(hass, stove):
+    """Return a factory for coordinators polling the simulated stove."""
+    const = integration("const")
+    scheduler = integration("scheduler")
+    coordinator_module = integration("coordinator")
+    hass.data[const.DOMAIN] = {
+        const.DATA_SCHEDULER: scheduler.FourHeatPollScheduler(2, spacing=0)
+    }
+    coordinators = []
+
+    def make(options=None, config=None, entry_id=None):
+        coordinator = coordinator_module.FourHeatDataUpdateCoordinator(
+            hass,
+            config={"name": "Stove", "host": "127.0.0.1", "port": stove.port,
+                    **(config or {})},
+            options=options or {},
+            id=entry_id or f"entry{len(coordinators)}",
+        )
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield make
+    for coordinator in coordinators:
+        await coordinator.async_close()
+
+
+@pytest.fixture
+async def stove_entry(hass, enable_custom_integrations, stove):
+    """Set up a config entry for the simulated stove."""
+    const = integration("const")
+    protocol = integration("protocol")
+    parser = integration("transport").FrameParser()
+    parser.feed(stove.reply(["SEL", "0"]))
+    entry = MockConfigEntry(
+        domain=const.DOMAIN,
+        title="Stove",
+        data={
+            CONF_HOST: "127.0.0.1",
+            CONF_PORT: stove.port,
+            const.CONF_MODE: False,
+            CONF_MONITORED_CONDITIONS: ["30001", "30005"],
+            const.CONF_CATALOGUE: protocol.build_catalogue(parser.items),
+        },
+    )
+    assert await async_setup_component(hass, const.DOMAIN, {})
+    hass.data[const.DOMAIN][const.DATA_SCHEDULER]._spacing = 0
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    yield entry
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
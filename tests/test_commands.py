@@ -0,0 +1,100 @@
+"""Tests for the command queue."""
+import asyncio
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from .conftest import integration
+
+commands = integration("commands")
+protocol = integration("protocol")
+
+
+async def test_writes_are_coalesced(hass):
+    sent = []
+    refreshed = []
+
+    async def send(frame):
+        sent.append(frame)
+        return protocol.CommandResult(True, 1, [])
+
+    async def refresh(ids):
+        refreshed.append(ids)
+
+    queue = commands.FourHeatCommandQueue(hass, send, refresh, delay=0.01)
+    results = await asyncio.gather(
+        queue.async_set_value("20493", 20),
+        queue.async_set_value("20364", 2),
+        queue.async_set_value("20493", 23),
+    )
+
+    assert sent == [protocol.build_write_frame({"20493": 23, "20364": 2})]
+    assert refreshed == [["20493", "20364"]]
+    assert all(result.ok for result in results)
+
+
+async def test_failed_batch_fails_every_caller(hass):
+    async def send(frame):
+        raise ValueError("no ack")
+
+    async def refresh(ids):
+        raise AssertionError("not refreshed after a failed batch")
+
+    queue = commands.FourHeatCommandQueue(hass, send, refresh, delay=0.01)
+    results = await asyncio.gather(
+        queue.async_set_value("20493", 20),
+        queue.async_set_value("20364", 2),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_cancel_stops_a_batch_being_sent(hass):
+    sending = asyncio.Event()
+    cancelled = []
+
+    async def send(frame):
+        sending.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(frame)
+            raise
+
+    async def refresh(ids):
+        raise AssertionError("not refreshed after a cancelled batch")
+
+    queue = commands.FourHeatCommandQueue(hass, send, refresh, delay=0.01)
+    write = hass.async_create_task(queue.async_set_value("20493", 20))
+    await sending.wait()
+    queue.cancel()
+
+    with pytest.raises(HomeAssistantError):
+        await write
+    assert len(cancelled) == 1
+
+
+async def test_writes_during_a_send_go_into_the_next_batch(hass):
+    sent = []
+    release = asyncio.Event()
+
+    async def send(frame):
+        sent.append(frame)
+        await release.wait()
+        return protocol.CommandResult(True, 1, [])
+
+    async def refresh(ids):
+        pass
+
+    queue = commands.FourHeatCommandQueue(hass, send, refresh, delay=0.01)
+    first = hass.async_create_task(queue.async_set_value("20493", 20))
+    await asyncio.sleep(0.05)
+    second = hass.async_create_task(queue.async_set_value("20364", 2))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert sent == [
+        protocol.build_write_frame({"20493": 20}),
+        protocol.build_write_frame({"20364": 2}),
+    ]
@@ -0,0 +1,61 @@
+"""Tests for the config flow, run against the stove simulator."""
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_MONITORED_CONDITIONS, CONF_NAME
+
+from .conftest import integration
+
+const = integration("const")
+config_flow = integration("config_flow")
+transport = integration("transport")
+
+
+@pytest.fixture
+def stove_transport(stove):
+    """Point the config flow at the simulated stove."""
+    with patch.object(
+        config_flow,
+        "FourHeatTransport",
+        partial(transport.FourHeatTransport, port=stove.port),
+    ):
+        yield
+
+
+async def _async_user_step(hass):
+    result = await hass.config_entries.flow.async_init(
+        const.DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    return await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {CONF_NAME: "Stove", CONF_HOST: "127.0.0.1", const.CONF_MODE: False},
+    )
+
+
+async def test_user_step_discovers_readings(
+    hass, enable_custom_integrations, stove_transport
+):
+    result = await _async_user_step(hass)
+    assert result["type"] == "create_entry"
+    assert "20493" in result["data"][const.CONF_CATALOGUE]
+
+
+async def test_user_step_reads_the_error_of_a_stove_in_error(
+    hass, enable_custom_integrations, stove, stove_transport
+):
+    stove.set_error(3)
+    result = await _async_user_step(hass)
+    assert result["type"] == "create_entry"
+    assert result["data"][const.CONF_CATALOGUE]["30002"] == ["J", 3]
+    assert result["data"][CONF_MONITORED_CONDITIONS][:1] == [const.RESULT_VALS]
+
+
+async def test_user_step_without_readings(
+    hass, enable_custom_integrations, stove, stove_transport
+):
+    stove.reply = lambda items: b'["ERR","0"]'
+    result = await _async_user_step(hass)
+    assert result["type"] == "form"
+    assert result["errors"] == {CONF_HOST: "could_not_connect"}
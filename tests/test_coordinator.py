@@ -0,0 +1,203 @@
+"""Tests for the coordinator, run against the stove simulator."""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import CONF_MONITORED_CONDITIONS
+from homeassistant.exceptions import HomeAssistantError
+
+from .conftest import integration
+
+const = integration("const")
+
+
+async def test_failed_polls_degrade_without_polling_faster(make_coordinator, stove):
+    coordinator = make_coordinator()
+    coordinator.async_add_listener(lambda: None)
+    await coordinator.async_refresh()
+    assert coordinator.health == const.HEALTH_HEALTHY
+    interval = coordinator.update_interval
+    slot = coordinator.index.slot(const.MODE_TYPE)
+
+    await stove.async_stop()
+    for _ in range(5):
+        await coordinator.async_refresh()
+        assert coordinator.health == const.HEALTH_DEGRADED
+        assert coordinator.last_update_success
+        assert coordinator.is_available(slot)
+        assert coordinator.update_interval >= interval / 2
+
+    # Offline once the last successful poll is max_age old
+    coordinator._last_poll_ok = time.time() - const.DEFAULT_MAX_AGE
+    await coordinator.async_refresh()
+    assert coordinator.health == const.HEALTH_OFFLINE
+    assert not coordinator.last_update_success
+    await stove.async_start()
+
+
+async def test_pushed_frames_keep_the_poll_timer(make_coordinator, stove):
+    stove.push = True
+    coordinator = make_coordinator({const.CONF_PUSH: True})
+    coordinator.async_add_listener(lambda: None)
+    await coordinator.async_refresh()
+    timer = coordinator._unsub_refresh
+    assert timer is not None
+
+    transport = integration("transport")
+    other = transport.FourHeatTransport("127.0.0.1", stove.port)
+    await other.async_request(b'["SEC","1","B20493000000000023"]')
+    await asyncio.sleep(0.1)
+
+    assert coordinator._push_active
+    assert coordinator.reading(coordinator.index.slot("20493")).value == 23
+    assert coordinator._unsub_refresh is timer
+
+
+async def test_settable_registers_get_their_limits(make_coordinator):
+    coordinator = make_coordinator({CONF_MONITORED_CONDITIONS: ["30001"]})
+    await coordinator.async_refresh()
+
+    assert coordinator.register_limits["20180"] == (50, 80)
+    assert coordinator._validate_write("20180", 200) == 80
+    assert coordinator._validate_write("20493", 1) == 5
+
+
+async def test_apply_profile_rejects_unknown_registers(make_coordinator, stove):
+    coordinator = make_coordinator()
+    await coordinator.async_refresh()
+    requests = stove.requests
+
+    with pytest.raises(HomeAssistantError):
+        await coordinator.async_apply_profile({"20493": 22, "99999": 5})
+    with pytest.raises(HomeAssistantError):
+        await coordinator.async_apply_profile({"30005": 5})
+    assert stove.requests == requests
+
+
+async def test_apply_profile_writes_one_batch(make_coordinator, stove):
+    coordinator = make_coordinator()
+    await coordinator.async_refresh()
+
+    written = await coordinator.async_apply_profile({"20493": 22, "20364": 3})
+    assert written == {"20493": 22}
+    assert stove.registers["20493"] == ("B", 22)
+
+
+async def test_error_state_keeps_targeted_queries(make_coordinator, stove):
+    coordinator = make_coordinator()
+    stove.set_error(3)
+    reply = stove.reply
+    stove.reply = lambda items: (
+        b'["ERR","0"]' if items[:1] == ["SEC"] else reply(items)
+    )
+    for _ in range(const.TARGETED_MAX_REFUSALS + 1):
+        await coordinator.async_refresh()
+    assert coordinator._targeted
+
+
+async def test_repeated_refusals_switch_to_sel(make_coordinator, stove):
+    coordinator = make_coordinator()
+    reply = stove.reply
+    stove.reply = lambda items: (
+        b'["ERR","0"]' if items[:1] == ["SEC"] else reply(items)
+    )
+    for _ in range(const.TARGETED_MAX_REFUSALS - 1):
+        await coordinator.async_refresh()
+        assert coordinator._targeted
+    await coordinator.async_refresh()
+    assert not coordinator._targeted
+    assert coordinator.last_update_success
+
+    # Probed again later, answered targeted queries are used again
+    stove.reply = reply
+    coordinator._targeted_retry = 0
+    await coordinator.async_refresh()
+    assert coordinator._targeted
+
+
+async def test_instrumentation_keeps_framing_and_merging_apart(
+    make_coordinator, monkeypatch
+):
+    stats = integration("stats")
+    monkeypatch.setattr(stats, "LOOP_LAG_INTERVAL", 0.01)
+    coordinator = make_coordinator({const.CONF_INSTRUMENTATION: True})
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+
+    phases = coordinator.stats.phases
+    assert phases[stats.PHASE_MERGE].count == 2
+    assert phases[stats.PHASE_FRAME].count == coordinator.stats.requests
+    await asyncio.sleep(0.05)
+    assert phases[stats.PHASE_LOOP_LAG].count > 0
+
+
+async def test_only_listeners_of_changed_readings_are_called(make_coordinator, stove):
+    coordinator = make_coordinator(
+        {CONF_MONITORED_CONDITIONS: ["30001", "30005", "30017"]}
+    )
+    called = []
+    for reading_id in ("30005", "30017"):
+        coordinator.async_add_listener(
+            lambda reading_id=reading_id: called.append(reading_id),
+            coordinator.index.slot(reading_id),
+        )
+    await coordinator.async_refresh()
+    assert sorted(called) == ["30005", "30017"]
+
+    called.clear()
+    stove.registers["30005"] = ("J", 150)
+    await coordinator.async_refresh()
+    assert called == ["30005"]
+
+
+async def test_interval_follows_the_stove_mode(make_coordinator, stove):
+    coordinator = make_coordinator()
+    for mode, interval in (
+        (2, const.DEFAULT_SCAN_INTERVAL_FAST),
+        (5, const.DEFAULT_SCAN_INTERVAL),
+        (0, const.DEFAULT_SCAN_INTERVAL_IDLE),
+    ):
+        stove.registers["30001"] = ("J", mode)
+        await coordinator.async_refresh()
+        seconds = coordinator.update_interval.total_seconds()
+        assert interval / 2 <= seconds <= interval * 1.5
+
+
+async def test_readings_are_polled_by_tier(make_coordinator):
+    coordinator = make_coordinator(
+        {CONF_MONITORED_CONDITIONS: ["30001", "30017", "20211"]}
+    )
+    await coordinator.async_refresh()
+    now = time.monotonic()
+
+    assert "30001" in coordinator._due_ids(now)
+    assert "30017" not in coordinator._due_ids(now)
+    later = now + const.TIER_AGES[const.TIER_NORMAL]
+    assert "30017" in coordinator._due_ids(later)
+    assert "20211" not in coordinator._due_ids(later + 86400)
+
+
+async def test_snapshot_is_restored_with_its_age(make_coordinator):
+    coordinator = make_coordinator(entry_id="stove")
+    await coordinator.async_refresh()
+    slot = coordinator.index.slot(const.MODE_TYPE)
+    seen = coordinator.last_seen(slot)
+    await coordinator.async_close()
+
+    restored = make_coordinator(entry_id="stove")
+    assert await restored.async_restore()
+    assert restored.stale
+    assert restored.reading(slot).value == 5
+    assert restored.last_seen(slot) == seen
+
+
+async def test_delayed_save_is_scheduled_once(make_coordinator):
+    coordinator = make_coordinator()
+    with patch.object(coordinator._store, "async_delay_save") as delay_save:
+        for _ in range(3):
+            await coordinator.async_refresh()
+        assert delay_save.call_count == 1
+        coordinator._data_to_save()
+        await coordinator.async_refresh()
+        assert delay_save.call_count == 2
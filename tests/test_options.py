@@ -0,0 +1,27 @@
+"""Tests for the options of a set up stove."""
+from homeassistant.const import CONF_MONITORED_CONDITIONS, CONF_SCAN_INTERVAL
+
+from .conftest import integration
+
+const = integration("const")
+
+
+async def test_options_add_sensors_and_change_the_interval(hass, stove_entry):
+    assert hass.states.get("sensor.stove_state") is not None
+    assert hass.states.get("sensor.stove_boiler_water") is None
+
+    result = await hass.config_entries.options.async_init(stove_entry.entry_id)
+    assert result["type"] == "form"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            CONF_MONITORED_CONDITIONS: ["30001", "30005", "30017"],
+            CONF_SCAN_INTERVAL: 120,
+        },
+    )
+    assert result["type"] == "create_entry"
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.stove_boiler_water").state == "62"
+    coordinator = hass.data[const.DOMAIN][stove_entry.entry_id][const.DATA_COORDINATOR]
+    assert coordinator._interval == 120
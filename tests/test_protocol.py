@@ -0,0 +1,44 @@
+"""Tests for the protocol helpers."""
+from .conftest import integration
+
+protocol = integration("protocol")
+
+
+def test_check_ack_accepts_echoed_records():
+    sent = ["SEC", "2", "B20493000000000023", "B20364000000000002"]
+    reply = ["SEC", "2", "B20493000000000023", "B20364000000000002"]
+    assert protocol.check_ack(sent, reply) is None
+
+
+def test_check_ack_reports_missing_records():
+    sent = ["SEC", "2", "B20493000000000023", "B20364000000000002"]
+    reply = ["SEC", "1", "B20493000000000023"]
+    error = protocol.check_ack(sent, reply)
+    assert error is not None
+    assert "B20364000000000002" in error
+
+
+def test_check_ack_rejects_err():
+    assert protocol.check_ack(["SEC", "1", "B20493000000000023"], ["ERR", "0"])
+    assert protocol.check_ack(["SEC", "1", "B20493000000000023"], [])
+
+
+def test_check_ack_legacy_commands_only_check_the_type():
+    assert protocol.check_ack(["SEC", "1", "1"], ["SEC", "1", "1"]) is None
+
+
+def test_reply_matches():
+    query = ["SEC", "2", "I30001000000000000", "I30005000000000000"]
+    assert protocol.reply_matches(query, ["SEC", "1", "J30001000000000005"])
+    assert protocol.reply_matches(query, ["ERR", "0"])
+    # A pushed frame about another reading is no reply
+    assert not protocol.reply_matches(query, ["SEC", "1", "B20493000000000023"])
+    assert not protocol.reply_matches(["SEL", "0"], ["SEC", "1", "B20493000000000023"])
+    assert protocol.reply_matches(["SEL", "0"], ["SEL", "1", "J30001000000000005"])
+
+
+def test_check_ack_compares_values():
+    sent = ["SEC", "1", "B20493000000000023"]
+    error = protocol.check_ack(sent, ["SEC", "1", "B20493000000000019"])
+    assert error is not None
+    assert "B20493000000000023" in error
@@ -0,0 +1,38 @@
+"""Tests for the sensor entities."""
+from datetime import timedelta
+
+from homeassistant.const import CONF_MONITORED_CONDITIONS
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from .conftest import integration
+
+const = integration("const")
+
+
+async def test_small_and_frequent_changes_are_filtered(hass, stove_entry, stove):
+    hass.config_entries.async_update_entry(
+        stove_entry, options={CONF_MONITORED_CONDITIONS: ["30001", "30026"]}
+    )
+    await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][stove_entry.entry_id][const.DATA_COORDINATOR]
+    entity_id = "sensor.stove_airstream"
+    assert hass.states.get(entity_id).state == "42"
+
+    # Within the deadband of 2, dropped
+    stove.registers["30026"] = ("J", 43)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "42"
+
+    # Outside the deadband but within the minimum interval, deferred
+    stove.registers["30026"] = ("J", 50)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "42"
+
+    entity = hass.data["sensor"].get_entity(entity_id)
+    entity._written_at -= 31
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == "50"
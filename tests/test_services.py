@@ -0,0 +1,69 @@
+"""Tests for the services of the integration."""
+import pytest
+import voluptuous as vol
+from homeassistant.exceptions import HomeAssistantError
+
+from .conftest import integration
+
+const = integration("const")
+
+
+async def test_get_history(hass, stove_entry):
+    response = await hass.services.async_call(
+        const.DOMAIN,
+        "get_history",
+        {"entity_id": "sensor.stove_exhaust_temperature", "window": "600"},
+        blocking=True,
+        return_response=True,
+    )
+    assert [sample["value"] for sample in response["samples"]] == [142]
+    assert response["summary"]["max"] == 142
+
+
+async def test_get_history_validates_its_input(hass, stove_entry):
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            const.DOMAIN,
+            "get_history",
+            {"entity_id": "sensor.stove_exhaust_temperature", "window": 0},
+            blocking=True,
+            return_response=True,
+        )
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            const.DOMAIN,
+            "get_history",
+            {"entity_id": "sensor.unknown"},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_snapshot_and_apply_profile(hass, stove_entry, stove):
+    snapshot = await hass.services.async_call(
+        const.DOMAIN,
+        "snapshot_registers",
+        {"entity_id": "sensor.stove_state"},
+        blocking=True,
+        return_response=True,
+    )
+    assert snapshot["registers"]["20493"] == 21
+
+    written = await hass.services.async_call(
+        const.DOMAIN,
+        "apply_profile",
+        {"entity_id": "sensor.stove_state", "registers": {"20493": 22, "20364": 3}},
+        blocking=True,
+        return_response=True,
+    )
+    assert written == {"written": {"20493": 22}}
+    assert stove.registers["20493"] == ("B", 22)
+
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            const.DOMAIN,
+            "apply_profile",
+            {"entity_id": "sensor.stove_state", "registers": {"99999": 5}},
+            blocking=True,
+        )
+    assert "99999" not in stove.registers
@@ -0,0 +1,114 @@
+"""Tests for the transport, run against the stove simulator."""
+import asyncio
+import time
+
+import pytest
+
+from .conftest import integration
+
+transport = integration("transport")
+const = integration("const")
+
+SEL = b'["SEL","0"]'
+
+
+def test_frame_parser_fragmented():
+    frame = b'["SEL","2","J30001000000000005","J30002000000000000"]'
+    parser = transport.FrameParser()
+    chunks = [frame[pos:pos + 3] for pos in range(0, len(frame), 3)]
+    results = [parser.feed(chunk) for chunk in chunks]
+    assert results == [False] * (len(chunks) - 1) + [True]
+    assert parser.items == ["SEL", "2", "J30001000000000005", "J30002000000000000"]
+
+
+def test_frame_parser_truncated():
+    parser = transport.FrameParser()
+    assert not parser.feed(b'["SEL","2","J3000100000')
+    assert parser.pending
+    assert not parser.complete
+
+
+def test_frame_parser_back_to_back():
+    parser = transport.FrameParser()
+    assert parser.feed(b'["SEC","1","B20493000000000023"]["SEL","1","J30001000000000005"]')
+    assert parser.items == ["SEC", "1", "B20493000000000023"]
+    second = transport.FrameParser()
+    assert second.feed(parser.remainder)
+    assert second.items == ["SEL", "1", "J30001000000000005"]
+
+
+def test_frame_parser_size_limit():
+    parser = transport.FrameParser(max_size=16)
+    with pytest.raises(transport.FourHeatTransportError):
+        parser.feed(b'["SEL","2","J30001000000000005"]')
+
+
+async def test_request_fragmented(stove):
+    stove.fragment = 3
+    client = transport.FourHeatTransport("127.0.0.1", stove.port)
+    records = await client.async_request(SEL)
+    assert records[0] == "SEL"
+    assert "J30001000000000005" in records
+
+
+async def test_request_truncated(stove):
+    stove.truncate = 1.0
+    client = transport.FourHeatTransport("127.0.0.1", stove.port, read_timeout=1)
+    with pytest.raises(transport.FourHeatTransportError):
+        await client.async_request(SEL)
+
+
+async def test_persistent_reuses_the_connection(stove):
+    client = transport.FourHeatTransport("127.0.0.1", stove.port, persistent=True)
+    for _ in range(3):
+        assert (await client.async_request(SEL))[0] == "SEL"
+    assert stove.connections == 1
+    await client.async_close()
+
+
+async def test_persistent_falls_back_to_single_requests(stove):
+    stove.close_after_reply = True
+    client = transport.FourHeatTransport("127.0.0.1", stove.port, persistent=True)
+    for _ in range(const.PERSISTENT_MAX_DROPS + 2):
+        assert (await client.async_request(SEL))[0] == "SEL"
+    assert not client.persistent
+    await client.async_close()
+
+
+async def test_pushed_frame_is_not_a_reply(stove):
+    stove.push = True
+    pushed = []
+    client = transport.FourHeatTransport(
+        "127.0.0.1", stove.port, persistent=True, on_unsolicited=pushed.append
+    )
+    other = transport.FourHeatTransport("127.0.0.1", stove.port)
+    await client.async_request(SEL)
+    await other.async_request(b'["SEC","1","B20493000000000023"]')
+
+    assert (await client.async_request(SEL))[0] == "SEL"
+    assert ["SEC", "2", "B20493000000000023", "J30001000000000005"] in pushed
+    await client.async_close()
+
+
+async def test_read_timeout_covers_the_whole_reply(socket_enabled):
+    writers = []
+
+    async def dribble(reader, writer):
+        writers.append(writer)
+        await reader.read(1024)
+        while not writer.is_closing():
+            writer.write(b'["SEC","1","B20493000000000023"]')
+            await asyncio.sleep(0.05)
+
+    server = await asyncio.start_server(dribble, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = transport.FourHeatTransport("127.0.0.1", port, read_timeout=0.3)
+    start = time.monotonic()
+    with pytest.raises(transport.FourHeatTransportError):
+        await client.async_request(b'["SEC","1","I30001000000000000"]')
+    assert time.monotonic() - start < 1
+    for writer in writers:
+        writer.close()
+    await asyncio.sleep(0.1)
+    server.close()
+    await server.wait_closed()